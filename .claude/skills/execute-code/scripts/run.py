@@ -14,10 +14,12 @@ Usage:
 
 import argparse
 import asyncio
+import contextlib
 import os
 import sys
 import tempfile
-import uuid
+import threading
+from collections.abc import AsyncIterator
 
 # Check for hyperlight-nanvix
 try:
@@ -28,60 +30,148 @@ except ImportError:
     print("Or build from source: https://github.com/hyperlight-dev/hyperlight-nanvix", file=sys.stderr)
     sys.exit(1)
 
+# --lang aliases and the workload file extension for each language
+_LANG_NORMALIZE = {"js": "javascript", "py": "python", "javascript": "javascript", "python": "python"}
+_EXT_FOR_LANG = {"python": "py", "javascript": "js"}
+
+# Resolved once per process rather than on every call
+_TMP_DIR = tempfile.gettempdir()
+_SANDBOX_CONFIG = SandboxConfig(
+    log_directory=_TMP_DIR,
+    tmp_directory=_TMP_DIR,
+)
+
+
+class SandboxRunner:
+    """Hand out warm NanvixSandbox instances, reusing them across calls.
+
+    Sandboxes are kept in a LIFO pool so the most recently used (warmest)
+    instance is handed out first. When the pool is empty a new sandbox is
+    constructed; when it is full, released sandboxes are dropped.
+    """
+
+    def __init__(self, config: SandboxConfig, maxsize: int = 4) -> None:
+        self._config = config
+        self._pool: asyncio.LifoQueue[NanvixSandbox] = asyncio.LifoQueue(maxsize=maxsize)
+
+    async def acquire(self) -> NanvixSandbox:
+        """Take a sandbox from the pool, or create one if none are idle."""
+        try:
+            return self._pool.get_nowait()
+        except asyncio.QueueEmpty:
+            return NanvixSandbox(self._config)
+
+    async def release(self, sandbox: NanvixSandbox) -> None:
+        """Return a sandbox to the pool for reuse."""
+        try:
+            self._pool.put_nowait(sandbox)
+        except asyncio.QueueFull:
+            pass
+
+    @contextlib.asynccontextmanager
+    async def sandbox(self) -> AsyncIterator[NanvixSandbox]:
+        """Borrow a sandbox for the duration of the ``async with`` block."""
+        sb = await self.acquire()
+        try:
+            yield sb
+        finally:
+            await self.release(sb)
+
+
+_runner: SandboxRunner | None = None
+
+# RAM-backed directory used for workload files when available (Linux)
+_SHM_DIR = "/dev/shm"
+_WORKLOAD_DIR = _SHM_DIR if os.access(_SHM_DIR, os.W_OK) else _TMP_DIR
+
+
+def _get_runner() -> SandboxRunner:
+    """Get or create the process-local sandbox runner."""
+    global _runner
+    if _runner is None:
+        _runner = SandboxRunner(_SANDBOX_CONFIG)
+    return _runner
+
+
+def _workload_path(extension: str) -> str:
+    """Return a unique path for a workload file.
+
+    The sandbox selects the runtime from the file extension, so the workload
+    needs a real named file. It is placed in /dev/shm so the file lives in
+    memory, falling back to the temp directory elsewhere.
+    """
+    filename = f"workload_{os.urandom(4).hex()}.{extension}"
+    return os.path.join(_WORKLOAD_DIR, filename)
+
+
+def _write_workload(path: str, code: bytes) -> None:
+    """Write the workload bytes straight to a new file, bypassing text I/O."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        view = memoryview(code)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+def _drain_fd(fd: int, buf: bytearray) -> None:
+    """Read ``fd`` to EOF into ``buf``."""
+    while chunk := os.read(fd, 65536):
+        buf.extend(chunk)
+
 
 async def execute_code(
-    code: str,
+    code: str | bytes,
     language: str = "javascript",
 ) -> str:
     """Execute code in hyperlight sandbox.
 
     Args:
-        code: The code to execute.
+        code: The code to execute, as text or UTF-8 encoded bytes.
         language: 'javascript' or 'python'.
 
     Returns:
         The execution output.
     """
-    tmp_dir = tempfile.gettempdir()
+    if isinstance(code, str):
+        code = code.encode("utf-8")
+    runner = _get_runner()
 
-    # Create sandbox
-    config = SandboxConfig(
-        log_directory=tmp_dir,
-        tmp_directory=tmp_dir,
-    )
-    sandbox = NanvixSandbox(config)
-
-    # Write code to temp file
-    extension = "py" if language == "python" else "js"
-    filename = f"workload_{uuid.uuid4().hex[:8]}.{extension}"
-    workload_path = os.path.join(tmp_dir, filename)
-    stdout_capture_path = os.path.join(tmp_dir, f"stdout_{uuid.uuid4().hex[:8]}.txt")
+    # Write code to a (preferably in-memory) workload file
+    extension = _EXT_FOR_LANG.get(language, "js")
+    workload_path = _workload_path(extension)
 
     try:
-        with open(workload_path, "w") as f:
-            f.write(code)
+        _write_workload(workload_path, code)
 
-        # Capture stdout at fd level since hyperlight writes directly to fd 1
+        # Capture stdout at fd level since hyperlight writes directly to fd 1.
+        # A daemon thread drains the read end of a pipe while the sandbox runs,
+        # so output never touches the filesystem and a full pipe cannot stall
+        # the sandbox, whatever the event loop is doing.
         original_stdout_fd = os.dup(1)
+        captured = bytearray()
+        read_fd, write_fd = os.pipe()
+        reader = threading.Thread(target=_drain_fd, args=(read_fd, captured), daemon=True)
+        reader.start()
         try:
-            with open(stdout_capture_path, "w") as capture_file:
-                os.dup2(capture_file.fileno(), 1)
-                sys.stdout.flush()
-                try:
+            try:
+                os.dup2(write_fd, 1)
+            finally:
+                os.close(write_fd)
+            sys.stdout.flush()
+            try:
+                async with runner.sandbox() as sandbox:
                     result = await sandbox.run(workload_path)
-                finally:
-                    sys.stdout.flush()
-                    os.dup2(original_stdout_fd, 1)
-
-            with open(stdout_capture_path, "r") as f:
-                captured_stdout = f.read().strip()
+            finally:
+                sys.stdout.flush()
+                # fd 1 was the last write end, so restoring it lets the reader hit EOF
+                os.dup2(original_stdout_fd, 1)
+                reader.join()
+            captured_stdout = captured.decode(errors="replace").strip()
         finally:
             os.close(original_stdout_fd)
-            if os.path.exists(stdout_capture_path):
-                try:
-                    os.remove(stdout_capture_path)
-                except OSError:
-                    pass
+            os.close(read_fd)
 
         if result.success:
             return captured_stdout if captured_stdout else "Execution completed successfully."
@@ -93,11 +183,10 @@ async def execute_code(
         return f"Error during sandbox execution: {e}"
 
     finally:
-        if os.path.exists(workload_path):
-            try:
-                os.remove(workload_path)
-            except OSError:
-                pass
+        try:
+            os.remove(workload_path)
+        except OSError:
+            pass
 
 
 def main():
@@ -132,18 +221,15 @@ Examples:
     args = parser.parse_args()
 
     # Normalize language
-    language = args.lang
-    if language == "js":
-        language = "javascript"
-    elif language == "py":
-        language = "python"
+    language = _LANG_NORMALIZE[args.lang]
 
     # Get code from --code or --file
+    # Code is handled as bytes end to end; only --code needs a single encode
     if args.file:
-        with open(args.file, "r") as f:
+        with open(args.file, "rb") as f:
             code = f.read()
     elif args.code:
-        code = args.code
+        code = args.code.encode("utf-8")
     else:
         parser.error("Either --code or --file is required")
 
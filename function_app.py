@@ -11,17 +11,23 @@ Configuration (via local.settings.json or environment variables):
 - AZURE_OPENAI_DEPLOYMENT_NAME: Model deployment name (e.g., gpt-4o-mini, gpt-5.1-codex-mini)
 - CODE_ENVIRONMENT: Execution environment - 'python' or 'hyperlight' (default: python)
 - HYPERLIGHT_LANGUAGE: Language for hyperlight - 'javascript' or 'python' (default: javascript)
+- OTEL_ENABLED: Set to 'true' to enable Agent Framework OpenTelemetry instrumentation
 """
 
 import logging
 import os
 
-from azure.identity import DefaultAzureCredential
 from agent_framework import ChatAgent
 from agent_framework.azure import AzureOpenAIResponsesClient, AgentFunctionApp
 from agent_framework.observability import enable_instrumentation
 
-from local_code_interpreter.shared import get_instructions, RetryOnRateLimitMiddleware
+from local_code_interpreter.shared import (
+    get_azure_credential,
+    get_instructions,
+    get_prompt_cache_key,
+    RetryOnRateLimitMiddleware,
+    without_sdk_rate_limit_retries,
+)
 from local_code_interpreter.tools import CodeExecutionTool, HYPERLIGHT_AVAILABLE
 
 # Enable logging
@@ -29,7 +35,9 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Enable Agent Framework instrumentation (logs tool calls, LLM requests, etc.)
-enable_instrumentation(enable_sensitive_data=True)
+# only when requested, so cold starts skip OpenTelemetry setup otherwise
+if os.getenv("OTEL_ENABLED", "").lower() in ("true", "1", "yes"):
+    enable_instrumentation(enable_sensitive_data=True)
 
 # Get configuration from environment
 endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
@@ -47,15 +55,21 @@ if environment == "hyperlight" and not HYPERLIGHT_AVAILABLE:
     logger.warning("hyperlight-nanvix not installed, falling back to python environment")
     environment = "python"
 
-logger.info(f"Using Azure OpenAI endpoint: {endpoint}, deployment: {deployment_name}")
-logger.info(f"Code execution environment: {environment}" + 
-            (f" ({hyperlight_language})" if environment == "hyperlight" else ""))
+logger.info("Using Azure OpenAI endpoint: %s, deployment: %s", endpoint, deployment_name)
+logger.info(
+    "Code execution environment: %s%s",
+    environment,
+    f" ({hyperlight_language})" if environment == "hyperlight" else "",
+)
 
 # Create the agent using Azure OpenAI Responses client (supports more models)
-client = AzureOpenAIResponsesClient(
-    endpoint=endpoint,
-    deployment_name=deployment_name,
-    credential=DefaultAzureCredential(),
+# The SDK retries transient errors; RetryOnRateLimitMiddleware handles rate limits
+client = without_sdk_rate_limit_retries(
+    AzureOpenAIResponsesClient(
+        endpoint=endpoint,
+        deployment_name=deployment_name,
+        credential=get_azure_credential(),
+    )
 )
 
 # Create code execution tool
@@ -66,6 +80,14 @@ code_tool = CodeExecutionTool(
     approval_mode="never_require",
 )
 
+# Create the sandbox while the host starts rather than on the first invocation.
+# Failures are logged and left to surface on the first tool call instead.
+try:
+    code_tool.prewarm()
+except (ImportError, OSError, RuntimeError) as e:
+    # Missing module or a sandbox the native binding could not create
+    logger.warning("Failed to pre-warm code execution sandbox: %s", e)
+
 # Get appropriate instructions for the environment
 instructions = get_instructions(environment, hyperlight_language)  # type: ignore[arg-type]
 
@@ -74,6 +96,7 @@ agent = ChatAgent(
     description="Local Code Interpreter Agent - Execute code in a sandboxed environment.",
     chat_client=client,
     instructions=instructions,
+    additional_chat_options={"prompt_cache_key": get_prompt_cache_key(instructions)},
     tools=[code_tool],  # Known issue: this configuration can fail on the second agent call.
                          # See https://github.com/microsoft/agent-framework/issues/3187 for details.
     middleware=[
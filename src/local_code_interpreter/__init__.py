@@ -1,25 +1,72 @@
 """Local Code Interpreter Tool - Built with Microsoft Agent Framework"""
 
+import importlib
+from typing import TYPE_CHECKING, Any
+
 __version__ = "0.1.0"
 
-from .agent import create_interpreter_agent
-from .shared import (
-    INTERPRETER_AGENT_INSTRUCTIONS_PYTHON,
-    INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS,
-    INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY,
-    RetryOnRateLimitMiddleware,
-    get_instructions,
-)
-from .tools import CodeExecutionTool, HyperlightLanguage, HYPERLIGHT_AVAILABLE
+# Public names are resolved lazily (PEP 562) so `import local_code_interpreter`
+# does not pull in the agent framework until an attribute is actually used.
+_LAZY_ATTRS: dict[str, tuple[str, str]] = {
+    "create_interpreter_agent": (".agent", "create_interpreter_agent"),
+    "ResponseCache": (".cache", "ResponseCache"),
+    "SQLiteResponseCache": (".cache", "SQLiteResponseCache"),
+    "INTERPRETER_AGENT_INSTRUCTIONS_PYTHON": (".shared", "INTERPRETER_AGENT_INSTRUCTIONS_PYTHON"),
+    "INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS": (
+        ".shared",
+        "INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS",
+    ),
+    "INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY": (
+        ".shared",
+        "INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY",
+    ),
+    "RetryOnRateLimitMiddleware": (".shared", "RetryOnRateLimitMiddleware"),
+    "get_azure_credential": (".shared", "get_azure_credential"),
+    "get_instructions": (".shared", "get_instructions"),
+    "CodeExecutionTool": (".tools", "CodeExecutionTool"),
+    "HyperlightLanguage": (".tools", "HyperlightLanguage"),
+    "HYPERLIGHT_AVAILABLE": (".tools", "HYPERLIGHT_AVAILABLE"),
+}
 
 __all__ = [
     "create_interpreter_agent",
+    "ResponseCache",
+    "SQLiteResponseCache",
     "INTERPRETER_AGENT_INSTRUCTIONS_PYTHON",
     "INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS",
     "INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY",
     "RetryOnRateLimitMiddleware",
+    "get_azure_credential",
     "get_instructions",
     "CodeExecutionTool",
     "HyperlightLanguage",
     "HYPERLIGHT_AVAILABLE",
 ]
+
+if TYPE_CHECKING:
+    from .agent import create_interpreter_agent
+    from .cache import ResponseCache, SQLiteResponseCache
+    from .shared import (
+        INTERPRETER_AGENT_INSTRUCTIONS_PYTHON,
+        INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS,
+        INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY,
+        RetryOnRateLimitMiddleware,
+        get_azure_credential,
+        get_instructions,
+    )
+    from .tools import CodeExecutionTool, HyperlightLanguage, HYPERLIGHT_AVAILABLE
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_path, attr = _LAZY_ATTRS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module_path, __name__), attr)
+    # Cache on the module so later lookups skip __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -12,41 +12,104 @@ Configuration:
 """
 
 import asyncio
+import functools
+import io
 import logging
 import os
-
-from dotenv import load_dotenv
-from agent_framework import AIFunction, ChatAgent
-from agent_framework.openai import OpenAIResponsesClient
-
+import sys
+import threading
+import time
+from collections.abc import Callable, Coroutine
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Literal, TextIO
+
+# agent_framework itself is already loaded by .shared and .tools; only the
+# provider, devui and observability subpackages below stay lazily imported
+from agent_framework import ChatAgent
+from agent_framework.exceptions import ServiceResponseException
+
+from .cache import (
+    DEFAULT_RESPONSE_CACHE_TTL,
+    ResponseCache,
+    SQLiteResponseCache,
+    make_cache_key,
+    open_response_cache,
+)
 from .shared import (
     RetryOnRateLimitMiddleware,
+    SharedBackoff,
+    backoff_schedule,
+    get_azure_credential,
     get_instructions,
+    get_prompt_cache_key,
+    is_rate_limit_error,
+    retry_on_rate_limit,
+    without_sdk_rate_limit_retries,
 )
 from .tools import CodeExecutionTool, HyperlightLanguage, HYPERLIGHT_AVAILABLE
 
-# Load environment variables from .env file
-load_dotenv()
+if TYPE_CHECKING:
+    import argparse
+
+    from agent_framework import AIFunction
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Streamed text is flushed on newlines, once enough characters are buffered,
+# or after a short interval, whichever comes first
+_STREAM_FLUSH_CHARS = 256
+_STREAM_FLUSH_INTERVAL = 0.05  # seconds
+
+# Rate-limit backoff shared by all streaming calls in this process
+_STREAM_BACKOFF = SharedBackoff()
+
+# Maximum number of demo queries streamed at once
+_MAX_CONCURRENT_QUERIES = 3
+
+# Third-party loggers capped at WARNING by _configure_logging
+_QUIET_LOGGERS = ("httpx", "httpcore", "openai", "azure")
 
+
+@functools.cache
+def _load_env() -> None:
+    """Load environment variables from the .env file (once per process)."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+
+@functools.cache
 def _is_azure_foundry_configured() -> bool:
-    """Check if Azure AI Foundry is configured."""
+    """Check if Azure AI Foundry is configured.
+
+    Configuration is read once per process.
+    """
+    _load_env()
     return bool(os.getenv("AZURE_FOUNDRY_RESOURCE"))
 
 
+@functools.cache
 def _is_azure_foundry_claude_configured() -> bool:
     """Check if Azure Foundry Claude is configured.
 
     Returns True if AZURE_FOUNDRY_RESOURCE is set and model name contains 'claude'.
+    Configuration is read once per process.
     """
+    _load_env()
     resource = os.getenv("AZURE_FOUNDRY_RESOURCE")
     model_name = os.getenv("AZURE_FOUNDRY_MODEL_NAME", "")
     return bool(resource) and "claude" in model_name.lower()
 
 
+@functools.cache
+def _get_foundry_model_name() -> str:
+    """Get the Azure Foundry model/deployment name (read once per process)."""
+    _load_env()
+    return os.getenv("AZURE_FOUNDRY_MODEL_NAME", "gpt-5.1-codex-mini")
+
+
+@functools.cache
 def _get_backend_name() -> str:
     """Get the name of the configured backend."""
     if _is_azure_foundry_claude_configured():
@@ -57,40 +120,49 @@ def _get_backend_name() -> str:
         return "OpenAI"
 
 
+@functools.lru_cache(maxsize=1)
 def _create_chat_client():
-    """Create the appropriate chat client based on environment configuration."""
+    """Create the appropriate chat client based on environment configuration.
+
+    The client is created once per process and shared by every agent. The SDK
+    keeps retrying transient errors, but not rate limits, which are retried by
+    this package.
+    """
     if _is_azure_foundry_configured():
         from agent_framework.azure import AzureOpenAIResponsesClient
 
         resource = os.getenv("AZURE_FOUNDRY_RESOURCE")
         foundry_endpoint = f"https://{resource}.openai.azure.com"
-        model_name = os.getenv("AZURE_FOUNDRY_MODEL_NAME", "gpt-5.1-codex-mini")
+        model_name = _get_foundry_model_name()
 
         # Check for API key first (local dev), then fall back to DefaultAzureCredential
         api_key = os.getenv("AZURE_FOUNDRY_API_KEY")
         if api_key:
-            return AzureOpenAIResponsesClient(
+            client = AzureOpenAIResponsesClient(
                 api_key=api_key,
                 endpoint=foundry_endpoint,
                 deployment_name=model_name,
             )
         else:
-            from azure.identity import DefaultAzureCredential
-
-            return AzureOpenAIResponsesClient(
-                credential=DefaultAzureCredential(),
+            client = AzureOpenAIResponsesClient(
+                credential=get_azure_credential(),
                 endpoint=foundry_endpoint,
                 deployment_name=model_name,
             )
+        return without_sdk_rate_limit_retries(client)
     else:
-        return OpenAIResponsesClient()
+        from agent_framework.openai import OpenAIResponsesClient
 
+        return without_sdk_rate_limit_retries(OpenAIResponsesClient())
 
+
+@functools.lru_cache(maxsize=1)
 def _create_anthropic_client():
     """Create an Anthropic client for Azure Foundry Claude.
 
     Uses AZURE_FOUNDRY_RESOURCE to construct the base URL.
     Authenticates via API key or Microsoft Entra ID (az login).
+    The client is created once per process and shared by every agent.
     """
     from agent_framework.anthropic import AnthropicClient
     from anthropic import AnthropicFoundry
@@ -111,10 +183,10 @@ def _create_anthropic_client():
             )
         )
     else:
-        from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+        from azure.identity import get_bearer_token_provider
 
         token_provider = get_bearer_token_provider(
-            DefaultAzureCredential(),
+            get_azure_credential(),
             "https://cognitiveservices.azure.com/.default",
         )
 
@@ -131,6 +203,47 @@ def _create_anthropic_client():
 # =============================================================================
 
 
+@functools.lru_cache(maxsize=8)
+def _get_code_tool(
+    environment: str,
+    timeout: int,
+    hyperlight_language: HyperlightLanguage,
+    approval_mode: Literal["always_require", "never_require"],
+) -> CodeExecutionTool:
+    """Get a shared CodeExecutionTool for the given configuration.
+
+    Agents created with the same settings reuse one tool instance, so its
+    setup (and the hyperlight sandbox it lazily creates) is paid once.
+    """
+    return CodeExecutionTool(
+        environment=environment,  # type: ignore[arg-type]
+        timeout=timeout,
+        hyperlight_language=hyperlight_language,
+        approval_mode=approval_mode,
+    )
+
+
+def invalidate_cache() -> None:
+    """Drop cached configuration, credentials, clients, tools and agents.
+
+    Use after changing environment variables (e.g. in tests) so the next
+    agent is built from the current configuration.
+    """
+    for cached in (
+        _is_azure_foundry_configured,
+        _is_azure_foundry_claude_configured,
+        _get_foundry_model_name,
+        _get_backend_name,
+        _create_chat_client,
+        _create_anthropic_client,
+        _get_code_tool,
+        create_interpreter_agent,
+        get_azure_credential,
+    ):
+        cached.cache_clear()
+
+
+@functools.lru_cache(maxsize=8)
 def create_interpreter_agent(
     environment: str = "python",
     timeout: int = 30,
@@ -150,7 +263,13 @@ def create_interpreter_agent(
         hyperlight_language: Language for hyperlight - 'javascript' or 'python'.
         name: Agent name (used by DevUI).
         description: Agent description (used by DevUI).
+
+    Agents are cached per argument set. Runs without a thread keep no
+    conversation state, so one agent can serve every turn and mode;
+    call invalidate_cache() after changing the configuration.
     """
+    _load_env()
+
     if environment == "hyperlight" and not HYPERLIGHT_AVAILABLE:
         import warnings
 
@@ -158,12 +277,7 @@ def create_interpreter_agent(
         environment = "python"
 
     tools: list[AIFunction] = [
-        CodeExecutionTool(
-            environment=environment,  # type: ignore[arg-type]
-            timeout=timeout,
-            hyperlight_language=hyperlight_language,
-            approval_mode="never_require",
-        ),
+        _get_code_tool(environment, timeout, hyperlight_language, "never_require"),
     ]
 
     # Select instructions based on environment and language
@@ -183,7 +297,7 @@ def create_interpreter_agent(
     if _is_azure_foundry_claude_configured():
         # Use Anthropic client for Claude models
         client = _create_anthropic_client()
-        model_name = os.getenv("AZURE_FOUNDRY_MODEL_NAME", "gpt-5.1-codex-mini")
+        model_name = _get_foundry_model_name()
         return client.create_agent(  # type: ignore[no-any-return]
             name=name,
             description=description,
@@ -199,6 +313,7 @@ def create_interpreter_agent(
             chat_client=_create_chat_client(),
             instructions=instructions,
             tools=tools,
+            additional_chat_options={"prompt_cache_key": get_prompt_cache_key(instructions)},
             middleware=[
                 RetryOnRateLimitMiddleware(
                     max_retries=5,
@@ -214,31 +329,117 @@ def create_interpreter_agent(
 # =============================================================================
 
 
-async def run_interactive_session(
-    environment: str = "python",
-    hyperlight_language: HyperlightLanguage = "javascript",
-) -> None:
-    """Run an interactive chat session with the interpreter agent."""
-    backend = _get_backend_name()
+def _prewarm_tools(agent: ChatAgent) -> None:
+    """Pre-warm the agent's code execution tools; failures resurface on first use."""
+    for tool in agent.chat_options.tools or []:
+        if isinstance(tool, CodeExecutionTool):
+            try:
+                tool.prewarm()
+            except (ImportError, OSError, RuntimeError) as e:
+                # Missing module or a sandbox the native binding could not create
+                logger.warning("Tool pre-warm failed: %s", e)
+
+
+def _get_env_info(environment: str, hyperlight_language: HyperlightLanguage) -> str:
+    """Describe the execution environment for banners, e.g. 'hyperlight/JavaScript'."""
     if environment == "hyperlight":
         lang = "Python" if hyperlight_language == "python" else "JavaScript"
-        env_info = f"hyperlight/{lang}"
-    else:
-        env_info = environment
+        return f"hyperlight/{lang}"
+    return environment
+
+
+def _print_banner(
+    environment: str, hyperlight_language: HyperlightLanguage, *extra_lines: str
+) -> None:
+    """Print the startup banner shared by the interactive and demo modes."""
+    env_info = _get_env_info(environment, hyperlight_language)
     print("=" * 60)
-    print(f"Local Code Interpreter Agent ({backend}, {env_info} environment)")
-    print("Type 'quit' or 'exit' to end the session")
+    print(f"Local Code Interpreter Agent ({_get_backend_name()}, {env_info} environment)")
+    for line in extra_lines:
+        print(line)
     print("=" * 60)
     print()
 
+
+def _get_response_cache() -> ResponseCache | SQLiteResponseCache | None:
+    """Open the response cache configured by RESPONSE_CACHE_PATH, if any.
+
+    Tool-calling answers are never cached, so only plain answers are reused.
+    RESPONSE_CACHE_TTL overrides how many seconds an answer stays valid.
+    """
+    cache_path = os.getenv("RESPONSE_CACHE_PATH")
+    if not cache_path:
+        return None
+    return open_response_cache(cache_path, ttl=_get_response_cache_ttl())
+
+
+def _get_response_cache_ttl() -> float:
+    """Read RESPONSE_CACHE_TTL (seconds), falling back to the default if unset or invalid."""
+    value = os.getenv("RESPONSE_CACHE_TTL")
+    if not value:
+        return DEFAULT_RESPONSE_CACHE_TTL
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(
+            "Invalid RESPONSE_CACHE_TTL %r, using the default of %.0fs",
+            value,
+            DEFAULT_RESPONSE_CACHE_TTL,
+        )
+        return DEFAULT_RESPONSE_CACHE_TTL
+
+
+async def _ainput(prompt: str) -> str:
+    """Read a line from stdin without blocking the event loop.
+
+    input() runs on a daemon thread rather than the default executor, so a
+    pending prompt neither holds the executor's only worker nor blocks
+    interpreter exit after Ctrl+C.
+    """
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[str] = loop.create_future()
+
+    def _deliver(set_value: Callable[[Any], None], value: Any) -> None:
+        if not future.done():
+            set_value(value)
+
+    def _read() -> None:
+        try:
+            result: tuple[Callable[[Any], None], Any] = (future.set_result, input(prompt))
+        except (EOFError, OSError, ValueError) as e:  # e.g. EOFError on Ctrl+D
+            result = (future.set_exception, e)
+        try:
+            loop.call_soon_threadsafe(_deliver, *result)
+        except RuntimeError:
+            pass  # Loop already closed
+
+    threading.Thread(target=_read, name="stdin-reader", daemon=True).start()
+    return await future
+
+
+async def run_interactive_session(
+    environment: str = "python",
+    hyperlight_language: HyperlightLanguage = "javascript",
+) -> None:
+    """Run an interactive chat session with the interpreter agent."""
+    _print_banner(environment, hyperlight_language, "Type 'quit' or 'exit' to end the session")
+
     agent = create_interpreter_agent(
         environment=environment,
         hyperlight_language=hyperlight_language,
     )
+    # Each turn is sent without a thread, so answers can be reused across turns
+    cache = _get_response_cache()
+
+    # Use the time the user spends typing the first prompt to set up the sandbox
+    # (speculatively running model turns instead could execute unrequested code)
+    # Runs on its own thread: the default executor has a single worker, which
+    # the event loop also needs for DNS lookups
+    threading.Thread(target=_prewarm_tools, args=(agent,), name="prewarm", daemon=True).start()
 
     while True:
         try:
-            user_input = input("You: ").strip()
+            user_input = (await _ainput("You: ")).strip()
             if not user_input:
                 continue
             if user_input.lower() in ("quit", "exit"):
@@ -246,7 +447,7 @@ async def run_interactive_session(
                 break
 
             print("Agent: ", end="", flush=True)
-            await run_streaming_with_retry(agent, user_input)
+            await run_streaming_with_retry(agent, user_input, cache=cache)
             print("\n")
 
         except KeyboardInterrupt:
@@ -254,45 +455,119 @@ async def run_interactive_session(
             break
 
 
+def _has_retry_middleware(agent: ChatAgent) -> bool:
+    """Return True if the agent retries rate limits with RetryOnRateLimitMiddleware."""
+    middleware = getattr(agent, "middleware", None) or []
+    return any(isinstance(m, RetryOnRateLimitMiddleware) for m in middleware)
+
+
 async def run_streaming_with_retry(
     agent: ChatAgent,
     query: str,
     max_retries: int = 5,
     min_wait: float = 2.0,
     max_wait: float = 60.0,
-) -> None:
+    backoff: SharedBackoff | None = None,
+    cache: ResponseCache | SQLiteResponseCache | None = None,
+    out: TextIO | None = None,
+    cache_tool_answers: bool = False,
+) -> str:
     """Run a streaming query with retry logic for rate limiting.
 
-    The Agent Framework middleware doesn't handle streaming errors,
-    so we wrap the entire streaming call with retry logic.
+    Agents with RetryOnRateLimitMiddleware already retry each model call
+    inside the stream's tool loop, so they are not retried again here. For
+    other agents (e.g. Claude), this layer restarts the run when it is rate
+    limited before anything was streamed, so code that already ran is never
+    run again. Concurrent streams share one backoff (``backoff``, or a
+    process-wide default) so they wait out a rate limit together.
+
+    If ``cache`` is given, a cached response is printed instead of calling
+    the model, and responses that did not call a tool are stored in it.
+    Set ``cache_tool_answers`` to also store answers that ran code, for
+    static queries whose code is deterministic.
+    Output goes to ``out`` (stdout by default).
+
+    Returns:
+        The full response text, as printed.
     """
-    from agent_framework.exceptions import ServiceResponseException
-
-    attempt = 0
-    while True:
-        attempt += 1
+    if out is None:
+        out = sys.stdout
+
+    cache_key = None
+    if cache is not None:
+        options = agent.chat_options
+        cache_key = make_cache_key(
+            str(options.model_id or ""), str(options.instructions or ""), query
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            out.write(cached)
+            out.flush()
+            return cached
+
+    started = False
+
+    async def stream_once() -> str:
+        nonlocal started
+        # Let the stream buffer small chunks instead of flushing each one
+        write = out.write
+        flush = out.flush
+        pending = 0
+        last_flush = time.monotonic()
+        buf: list[str] = []
+        used_tools = False
         try:
             async for chunk in agent.run_stream(query):
-                if chunk.text:
-                    print(chunk.text, end="", flush=True)
-            break  # Success, exit retry loop
-        except ServiceResponseException as e:
-            error_msg = str(e).lower()
-            if "too many requests" in error_msg or "429" in error_msg:
-                if attempt > max_retries:
-                    print(f"\n[Rate limit exceeded after {max_retries} retries]")
-                    raise
-                # Calculate wait time with exponential backoff + jitter
-                import random
-
-                wait_time = min(min_wait * (2 ** (attempt - 1)), max_wait)
-                wait_time += random.uniform(0, wait_time * 0.1)  # Add 10% jitter
-                print(
-                    f"\n[Rate limited, retrying in {wait_time:.1f}s (attempt {attempt}/{max_retries})...]"
-                )
-                await asyncio.sleep(wait_time)
-            else:
-                raise
+                started = True
+                if cache_key is not None and not cache_tool_answers and not used_tools:
+                    used_tools = any(c.type == "function_call" for c in chunk.contents)
+                # .text joins the chunk's text contents on every access; read it once
+                text = chunk.text
+                if text:
+                    write(text)
+                    buf.append(text)
+                    pending += len(text)
+                    now = time.monotonic()
+                    if (
+                        pending >= _STREAM_FLUSH_CHARS
+                        or now - last_flush >= _STREAM_FLUSH_INTERVAL
+                        or "\n" in text
+                    ):
+                        flush()
+                        pending = 0
+                        last_flush = now
+        finally:
+            flush()
+        response = "".join(buf)
+        # Tool calls have side effects, so by default only plain answers are cached
+        if cache is not None and cache_key is not None and not used_tools:
+            cache.set(cache_key, response)
+        return response
+
+    # One retry layer per call path: the middleware's, when the agent has it
+    if _has_retry_middleware(agent):
+        max_retries = 0
+
+    def report_retry(error: BaseException, wait_time: float, attempt: int) -> None:
+        print(
+            f"\n[Rate limited, retrying in {wait_time:.1f}s (attempt {attempt}/{max_retries})...]",
+            file=out,
+            flush=True,
+        )
+
+    try:
+        return await retry_on_rate_limit(
+            stream_once,
+            backoff_schedule(max_retries, min_wait, max_wait),
+            backoff or _STREAM_BACKOFF,
+            exceptions=ServiceResponseException,
+            on_retry=report_retry,
+            retry_if=lambda e: not started and is_rate_limit_error(e),
+        )
+    except ServiceResponseException as e:
+        if is_rate_limit_error(e) and not started:
+            print("\n[Rate limit exceeded after retries]", file=out, flush=True)
+        raise
 
 
 async def run_example_queries(
@@ -300,16 +575,7 @@ async def run_example_queries(
     hyperlight_language: HyperlightLanguage = "javascript",
 ) -> None:
     """Run some example queries to demonstrate the agent's capabilities."""
-    backend = _get_backend_name()
-    if environment == "hyperlight":
-        lang = "Python" if hyperlight_language == "python" else "JavaScript"
-        env_info = f"hyperlight/{lang}"
-    else:
-        env_info = environment
-    print("=" * 60)
-    print(f"Local Code Interpreter Agent ({backend}, {env_info} environment)")
-    print("=" * 60)
-    print()
+    _print_banner(environment, hyperlight_language)
 
     agent = create_interpreter_agent(
         environment=environment,
@@ -322,13 +588,39 @@ async def run_example_queries(
         "What is 2^100?",
     ]
 
-    for i, query in enumerate(example_queries):
-        # Ask agent to show the code it runs
-        verbose_query = f"{query}. Please show me the code you execute."
+    # The demo queries are fixed and their code is deterministic, so answers
+    # that ran code can be replayed too
+    cache = _get_response_cache()
+
+    # The queries are independent, so run them concurrently (capped to stay
+    # within provider concurrency limits) and buffer each answer to print the
+    # transcript in order once they all finish; a failed query does not stop
+    # the others and is reported in its place
+    limit = asyncio.Semaphore(_MAX_CONCURRENT_QUERIES)
+    buffers = [io.StringIO() for _ in example_queries]
+
+    async def run_query(query: str, buf: io.StringIO) -> None:
+        async with limit:
+            # Ask agent to show the code it runs
+            await run_streaming_with_retry(
+                agent,
+                f"{query}. Please show me the code you execute.",
+                cache=cache,
+                out=buf,
+                cache_tool_answers=True,
+            )
+
+    results = await asyncio.gather(
+        *(run_query(q, buf) for q, buf in zip(example_queries, buffers)),
+        return_exceptions=True,
+    )
+
+    for query, buf, result in zip(example_queries, buffers, results):
         print(f"User: {query}")
-        print("Agent: ", end="", flush=True)
-        await run_streaming_with_retry(agent, verbose_query)
-        print("\n")
+        print(f"Agent: {buf.getvalue()}")
+        if isinstance(result, BaseException):
+            print(f"[Query failed: {type(result).__name__}: {result}]")
+        print()
 
 
 def _configure_logging(verbose: bool = False) -> None:
@@ -336,13 +628,18 @@ def _configure_logging(verbose: bool = False) -> None:
 
     Debug mode can be enabled via environment variable: DEBUG=true
     """
-    from agent_framework.observability import enable_instrumentation
+    # Reduce noise from libraries before anything below imports them, so their
+    # import-time records are filtered without being formatted
+    for name in _QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
 
     # Check environment variable for debug mode
     debug = os.getenv("DEBUG", "").lower() in ("true", "1", "yes")
 
     # Enable Agent Framework's OpenTelemetry instrumentation
     if verbose or debug:
+        from agent_framework.observability import enable_instrumentation
+
         # Enable sensitive data logging for development
         enable_instrumentation(enable_sensitive_data=True)
 
@@ -364,12 +661,6 @@ def _configure_logging(verbose: bool = False) -> None:
     if debug:
         logging.getLogger("local_code_interpreter").setLevel(logging.DEBUG)
 
-    # Reduce noise from libraries
-    logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("httpcore").setLevel(logging.WARNING)
-    logging.getLogger("openai").setLevel(logging.WARNING)
-    logging.getLogger("azure").setLevel(logging.WARNING)
-
 
 def run_devui(
     environment: str = "python",
@@ -394,29 +685,45 @@ def run_devui(
         hyperlight_language=hyperlight_language,
     )
 
-    backend = _get_backend_name()
-    if environment == "hyperlight":
-        lang = "Python" if hyperlight_language == "python" else "JavaScript"
-        env_info = f"hyperlight/{lang}"
-    else:
-        env_info = environment
     logger.info("=" * 60)
     logger.info("Local Code Interpreter - DevUI")
     logger.info("=" * 60)
-    logger.info(f"Backend: {backend}")
-    logger.info(f"Environment: {env_info}")
-    logger.info(f"Server: http://{host}:{port}")
+    logger.info("Backend: %s", _get_backend_name())
+    logger.info("Environment: %s", _get_env_info(environment, hyperlight_language))
+    logger.info("Server: http://%s:%s", host, port)
     logger.info("=" * 60)
 
     serve(entities=[agent], port=port, host=host, auto_open=auto_open)
 
 
-def cli() -> None:
-    """Command-line interface entry point.
+def _new_event_loop() -> asyncio.AbstractEventLoop:
+    """Create an event loop, preferring uvloop when it is installed (not on Windows)."""
+    if sys.platform != "win32":
+        try:
+            import uvloop  # type: ignore[import-not-found]
 
-    Handles all argument parsing in one place and dispatches to the appropriate mode.
-    This is a sync function because run_devui() runs its own event loop.
+            return uvloop.new_event_loop()  # type: ignore[no-any-return]
+        except ImportError:
+            pass
+    return asyncio.new_event_loop()
+
+
+def _run_async(main: Coroutine[Any, Any, None]) -> None:
+    """Run a coroutine to completion on a lightweight event loop.
+
+    The CLI issues a handful of requests per process, so the default executor
+    is capped at a single worker instead of being sized to the machine.
+    uvloop is used when available for cheaper socket and timer handling
+    while streaming responses. asyncio.Runner cancels leftover tasks and
+    turns Ctrl+C into cancellation of ``main``.
     """
+    with asyncio.Runner(loop_factory=_new_event_loop) as runner:
+        runner.get_loop().set_default_executor(ThreadPoolExecutor(max_workers=1))
+        runner.run(main)
+
+
+def _build_parser() -> "argparse.ArgumentParser":
+    """Build the command-line argument parser."""
     import argparse
 
     parser = argparse.ArgumentParser(description="Local Code Interpreter Agent")
@@ -443,7 +750,19 @@ def cli() -> None:
         help="Use hyperlight VM sandbox. Optional: python, js, javascript (default: javascript)",
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+def cli() -> None:
+    """Command-line interface entry point.
+
+    Handles all argument parsing in one place and dispatches to the appropriate mode.
+    This is a sync function because run_devui() runs its own event loop.
+    """
+    args = _build_parser().parse_args()
+
+    # Load .env before anything reads configuration (e.g. DEBUG in logging setup)
+    _load_env()
 
     # Determine environment and language
     if args.hyperlight:
@@ -469,14 +788,18 @@ def cli() -> None:
             auto_open=not args.no_browser,
         )
     elif args.interactive:
-        asyncio.run(
-            run_interactive_session(
-                environment=environment,
-                hyperlight_language=hyperlight_language,
+        try:
+            _run_async(
+                run_interactive_session(
+                    environment=environment,
+                    hyperlight_language=hyperlight_language,
+                )
             )
-        )
+        except KeyboardInterrupt:
+            # Ctrl+C while awaiting input lands in the event loop, not the session
+            print("\nGoodbye!")
     else:
-        asyncio.run(
+        _run_async(
             run_example_queries(
                 environment=environment,
                 hyperlight_language=hyperlight_language,
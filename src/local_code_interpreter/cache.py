@@ -0,0 +1,225 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""
+Response cache for Local Code Interpreter agents.
+
+Caches the full streamed text of an agent response, keyed by a hash of the
+model, instructions and query, so repeated deterministic prompts skip the
+LLM round-trip. Responses that invoked a tool are never cached, since the
+tool run (code execution) is a side effect the caller expects to happen.
+
+Two stores share the same get/set interface: an in-memory LRU with optional
+JSON persistence (ResponseCache) and a SQLite database (SQLiteResponseCache).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any
+
+try:
+    import orjson  # type: ignore[import-not-found]
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Default lifetime of a cached response opened by open_response_cache (one day)
+DEFAULT_RESPONSE_CACHE_TTL = 24 * 60 * 60.0
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)  # type: ignore[no-any-return]
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Strip surrounding and trailing whitespace so padded prompts share a cache entry.
+
+    Line breaks, indentation and case are preserved, since they are
+    significant in code-related prompts.
+    """
+    return "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+
+
+def make_cache_key(model: str, instructions: str, query: str) -> str:
+    """Build the cache key for a (model, instructions, query) triple.
+
+    The instructions identify the execution environment and language, since
+    each environment has its own prompt.
+    """
+    return hashlib.sha256(
+        b"\0".join([model.encode(), instructions.encode(), normalize_prompt(query).encode()])
+    ).hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of agent responses with optional TTL and JSON persistence.
+
+    Args:
+        maxsize: Maximum number of responses kept; least recently used are evicted.
+        ttl: Seconds a response stays valid, or None to keep it until evicted.
+        path: Optional JSON file the cache is loaded from and saved to.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: float | None = None,
+        path: str | None = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        # key -> (stored_at, text), ordered least to most recently used
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        if path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response for ``key``, or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, text = entry
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        """Store ``text`` under ``key`` and persist if a path is configured."""
+        self._entries[key] = (time.time(), text)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        if self.path:
+            self._save()
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        self._entries.clear()
+        if self.path:
+            self._save()
+
+    def _load(self) -> None:
+        assert self.path is not None
+        try:
+            with open(self.path, "rb") as f:
+                data = _loads(f.read())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable response cache %s: %s", self.path, e)
+            return
+        for key, (stored_at, text) in data.items():
+            self._entries[key] = (stored_at, text)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _save(self) -> None:
+        assert self.path is not None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial file
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps(self._entries))
+        os.replace(tmp_path, self.path)
+
+
+class SQLiteResponseCache:
+    """Response cache stored in a SQLite database.
+
+    Suited to long-lived caches shared between processes: the database runs
+    in WAL mode, so readers don't block the writer. Responses are stored
+    zlib-compressed.
+
+    Args:
+        path: Database file path.
+        ttl: Seconds a response stays valid, or None to keep it forever.
+    """
+
+    def __init__(self, path: str, ttl: float | None = None):
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, stored_at REAL NOT NULL, data BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        return int(count)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response for ``key``, or None on a miss."""
+        row = self._conn.execute(
+            "SELECT stored_at, data FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        stored_at, data = row
+        if self.ttl is not None and time.time() - stored_at > self.ttl:
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        return zlib.decompress(data).decode("utf-8")
+
+    def set(self, key: str, text: str) -> None:
+        """Store ``text`` under ``key``."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, stored_at, data) VALUES (?, ?, ?)",
+                (key, time.time(), zlib.compress(text.encode("utf-8"))),
+            )
+
+    def clear(self) -> None:
+        """Remove all cached responses."""
+        with self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+
+def open_response_cache(
+    path: str, ttl: float | None = DEFAULT_RESPONSE_CACHE_TTL
+) -> ResponseCache | SQLiteResponseCache:
+    """Open the response cache at ``path``.
+
+    ``.db``/``.sqlite`` paths use SQLite; anything else is a JSON file.
+    Responses expire after ``ttl`` seconds (one day by default), so answers
+    from an older model or prompt are not replayed forever.
+    """
+    path = os.path.expanduser(path)
+    if path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SQLiteResponseCache(path, ttl=ttl)
+    return ResponseCache(ttl=ttl, path=path)
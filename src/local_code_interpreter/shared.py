@@ -7,34 +7,32 @@ This module contains shared configuration, instructions, and utilities
 used by both the CLI agent (agent.py) and Azure Functions agent (function_app.py).
 """
 
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Awaitable, Callable, Literal
+import random
+import sys
+from collections.abc import AsyncIterator, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Literal
 
-from tenacity import (
-    retry,
-    retry_if_exception_message,
-    stop_after_attempt,
-    wait_exponential_jitter,
-)
+import openai
 from agent_framework import ChatContext, ChatMiddleware
 
+if TYPE_CHECKING:
+    import httpx
+    from azure.identity import DefaultAzureCredential
+
 logger = logging.getLogger(__name__)
 
 # =============================================================================
 # Agent Instructions
 # =============================================================================
 
-INTERPRETER_AGENT_INSTRUCTIONS_PYTHON = """You are a Local Code Interpreter Assistant, helping users execute and test code.
-
-Your capabilities include:
-- Executing Python code in a sandboxed environment using the execute_code tool
-- Testing code snippets and algorithms
-- Running calculations and data processing
-
-IMPORTANT: The execute_code tool captures stdout/stderr output. To see results:
-- Always use print() to display values (e.g., print(2 + 2) not just 2 + 2)
-- For expressions, wrap them in print() to see the output
-- Without print(), calculations run silently with no visible result
+# The shared text comes first and the environment-specific text last, so every
+# prompt starts with the same bytes and provider prefix caches are reused
+# when an agent switches environment.
+_INSTRUCTIONS_COMMON_PREFIX = """You are a Local Code Interpreter Assistant, helping users execute and test code.
 
 When to use execute_code:
 - When you need to perform calculations or verify mathematical results
@@ -46,11 +44,21 @@ ALWAYS show the code you are about to execute to the user before running it.
 
 Always be clear and concise. When reporting issues, include actionable recommendations.
 If you need more information to help, ask clarifying questions.
+
 """
 
-INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS = """You are a Local Code Interpreter Assistant, helping users execute and test code.
+_PYTHON_SUFFIX = """Your capabilities include:
+- Executing Python code in a sandboxed environment using the execute_code tool
+- Testing code snippets and algorithms
+- Running calculations and data processing
+
+IMPORTANT: The execute_code tool captures stdout/stderr output. To see results:
+- Always use print() to display values (e.g., print(2 + 2) not just 2 + 2)
+- For expressions, wrap them in print() to see the output
+- Without print(), calculations run silently with no visible result
+"""
 
-Your capabilities include:
+_HYPERLIGHT_JS_SUFFIX = """Your capabilities include:
 - Executing JavaScript code in a secure VM-isolated sandbox using the execute_code tool
 - Testing code snippets and algorithms
 - Running calculations and data processing
@@ -59,22 +67,9 @@ IMPORTANT: You are running in hyperlight mode which uses JavaScript. Always writ
 - Use console.log() to display values (e.g., console.log(2 + 2) not just 2 + 2)
 - For expressions, wrap them in console.log() to see the output
 - Without console.log(), calculations run silently with no visible result
-
-When to use execute_code:
-- When you need to perform calculations or verify mathematical results
-- When you need to test a code snippet or algorithm
-- When the user asks you to run or execute code
-- When you need to process data or demonstrate functionality
-
-ALWAYS show the code you are about to execute to the user before running it.
-
-Always be clear and concise. When reporting issues, include actionable recommendations.
-If you need more information to help, ask clarifying questions.
 """
 
-INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY = """You are a Local Code Interpreter Assistant, helping users execute and test code.
-
-Your capabilities include:
+_HYPERLIGHT_PY_SUFFIX = """Your capabilities include:
 - Executing Python code in a secure VM-isolated sandbox using the execute_code tool
 - Testing code snippets and algorithms
 - Running calculations and data processing
@@ -83,25 +78,33 @@ IMPORTANT: You are running in hyperlight mode with Python. The code executes in
 - Use print() to display values (e.g., print(2 + 2) not just 2 + 2)
 - For expressions, wrap them in print() to see the output
 - Without print(), calculations run silently with no visible result
-
-When to use execute_code:
-- When you need to perform calculations or verify mathematical results
-- When you need to test a code snippet or algorithm
-- When the user asks you to run or execute code
-- When you need to process data or demonstrate functionality
-
-ALWAYS show the code you are about to execute to the user before running it.
-
-Always be clear and concise. When reporting issues, include actionable recommendations.
-If you need more information to help, ask clarifying questions.
 """
 
+# Intern the prompts so every agent shares one canonical object per prompt.
+# Providers cache the prompt prefix server-side only on a byte-for-byte match,
+# so do not edit whitespace in the prompts without reason.
+INTERPRETER_AGENT_INSTRUCTIONS_PYTHON = sys.intern(_INSTRUCTIONS_COMMON_PREFIX + _PYTHON_SUFFIX)
+INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS = sys.intern(
+    _INSTRUCTIONS_COMMON_PREFIX + _HYPERLIGHT_JS_SUFFIX
+)
+INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY = sys.intern(
+    _INSTRUCTIONS_COMMON_PREFIX + _HYPERLIGHT_PY_SUFFIX
+)
+
 
 # =============================================================================
 # Environment Helpers
 # =============================================================================
 HyperlightLanguage = Literal["javascript", "python"]
 
+# Instructions keyed by (environment, hyperlight_language); non-hyperlight
+# environments ignore the language and use ("python", "")
+_INSTRUCTIONS: dict[tuple[str, str], str] = {
+    ("python", ""): INTERPRETER_AGENT_INSTRUCTIONS_PYTHON,
+    ("hyperlight", "javascript"): INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS,
+    ("hyperlight", "python"): INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY,
+}
+
 
 def get_instructions(
     environment: str = "python",
@@ -117,12 +120,38 @@ def get_instructions(
         The appropriate instruction string for the agent.
     """
     if environment == "hyperlight":
-        return (
-            INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY
-            if hyperlight_language == "python"
-            else INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS
+        return _INSTRUCTIONS.get(
+            (environment, hyperlight_language), INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS
         )
-    return INTERPRETER_AGENT_INSTRUCTIONS_PYTHON
+    return _INSTRUCTIONS[("python", "")]
+
+
+def get_prompt_cache_key(instructions: str) -> str:
+    """Get the provider prompt-cache key for a set of instructions.
+
+    Requests that share a key are routed to the same prompt cache, so the
+    system prompt's prefill is reused across turns. The key is derived from
+    the prompt itself, so editing a prompt moves it to a fresh cache entry.
+    """
+    digest = hashlib.sha256(instructions.encode()).hexdigest()[:16]
+    return f"local-code-interpreter-{digest}"
+
+
+# =============================================================================
+# Azure Credentials
+# =============================================================================
+
+
+@functools.lru_cache(maxsize=1)
+def get_azure_credential() -> "DefaultAzureCredential":
+    """Get the process-wide DefaultAzureCredential.
+
+    Building the credential probes the whole credential chain, so a single
+    instance is shared by every client. Sharing it also shares its token cache.
+    """
+    from azure.identity import DefaultAzureCredential
+
+    return DefaultAzureCredential()
 
 
 # =============================================================================
@@ -130,11 +159,140 @@ def get_instructions(
 # =============================================================================
 
 
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Return True if the exception looks like a rate limit (429) error.
+
+    HTTP errors that carry a ``status_code`` are classified without formatting
+    the (possibly long) message; anything else falls back to plain substring
+    checks, which are cheaper than a regex search here.
+    """
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    message = str(exc)
+    return "429" in message or "too many requests" in message.lower()
+
+
+def backoff_schedule(max_retries: int, min_wait: float, max_wait: float) -> tuple[float, ...]:
+    """Precompute the exponential backoff wait (before jitter) for each retry.
+
+    Args:
+        max_retries: Number of retry attempts.
+        min_wait: Wait time in seconds before the first retry.
+        max_wait: Upper bound for any single wait.
+
+    Returns:
+        A tuple where index ``i`` is the wait before retry ``i + 1``.
+    """
+    return tuple(min(min_wait * (1 << i), max_wait) for i in range(max_retries))
+
+
+# Backoff waits shorter than this (seconds) are not worth a timer
+_MIN_SLEEP = 0.001
+
+# Private generator for retry jitter, independent of the global random state
+_JITTER_RNG = random.Random()
+
+
+def with_jitter(seconds: float) -> float:
+    """Add up to 10% random jitter to a backoff wait."""
+    return seconds + seconds * 0.1 * _JITTER_RNG.random()
+
+
+class SharedBackoff:
+    """Rate-limit backoff shared by concurrent callers.
+
+    When any caller is rate limited it pushes out a shared deadline. Every
+    caller that backs off (or is about to send a request) waits for that one
+    deadline instead of sleeping on its own schedule, so a burst of 429s
+    turns into a single wait rather than a thundering herd when it ends.
+    """
+
+    def __init__(self) -> None:
+        self._until = 0.0
+
+    async def sleep(self, seconds: float) -> None:
+        """Extend the shared deadline by ``seconds`` from now and wait for it."""
+        loop = asyncio.get_running_loop()
+        self._until = max(self._until, loop.time() + seconds)
+        delay = self._until - loop.time()
+        # Sub-millisecond waits just yield rather than arming a timer
+        await asyncio.sleep(delay if delay >= _MIN_SLEEP else 0)
+
+    async def wait(self) -> None:
+        """Wait until any active backoff has elapsed."""
+        delay = self._until - asyncio.get_running_loop().time()
+        if delay >= _MIN_SLEEP:
+            await asyncio.sleep(delay)
+
+
+async def _mark_rate_limit_final(response: "httpx.Response") -> None:
+    """httpx response hook telling the OpenAI SDK not to retry a 429."""
+    # The SDK obeys x-should-retry before falling back to its status code checks
+    if response.status_code == 429:
+        response.headers["x-should-retry"] = "false"
+
+
+def without_sdk_rate_limit_retries[ClientT](client: ClientT) -> ClientT:
+    """Stop the OpenAI SDK retrying rate limits on an OpenAI-compatible chat client.
+
+    Rate limits are retried by RetryOnRateLimitMiddleware under a shared
+    backoff; letting the SDK retry them as well would multiply the upstream
+    calls made for every 429. The SDK still retries connection errors,
+    timeouts and 408/409/5xx responses.
+    """
+    http_client = openai.DefaultAsyncHttpxClient(event_hooks={"response": [_mark_rate_limit_final]})
+    client.client = client.client.with_options(http_client=http_client)  # type: ignore[attr-defined]
+    return client
+
+
+async def retry_on_rate_limit[T](
+    call: Callable[[], Awaitable[T]],
+    waits: tuple[float, ...],
+    backoff: SharedBackoff,
+    max_wait: float | None = None,
+    exceptions: type[BaseException] | tuple[type[BaseException], ...] = Exception,
+    on_retry: Callable[[BaseException, float, int], None] | None = None,
+    retry_if: Callable[[BaseException], bool] = is_rate_limit_error,
+) -> T:
+    """Await ``call()``, retrying rate limit errors with exponential backoff.
+
+    Args:
+        call: Zero-argument coroutine function making one attempt.
+        waits: Backoff before each retry, e.g. from backoff_schedule(); its
+            length is the maximum number of retries.
+        backoff: Shared backoff that every wait goes through.
+        max_wait: Optional cap on a wait after jitter is added.
+        exceptions: Exception types that may be retried; others propagate.
+        on_retry: Called with (error, wait_time, retry_number) before each wait.
+        retry_if: Decides whether a caught error is retried; defaults to
+            is_rate_limit_error.
+
+    Returns:
+        The result of the first successful attempt.
+    """
+    attempt = 0
+    while True:
+        await backoff.wait()
+        try:
+            return await call()
+        except exceptions as e:
+            if attempt >= len(waits) or not retry_if(e):
+                raise
+            # Exponential backoff from the precomputed schedule + 10% jitter
+            wait_time = with_jitter(waits[attempt])
+            if max_wait is not None:
+                wait_time = min(wait_time, max_wait)
+            attempt += 1
+            if on_retry is not None:
+                on_retry(e, wait_time, attempt)
+            await backoff.sleep(wait_time)
+
+
 class RetryOnRateLimitMiddleware(ChatMiddleware):
     """Chat middleware that retries on rate limit (429) errors with exponential backoff.
 
     Note: Agent Framework doesn't provide built-in retry middleware yet (as of preview).
-    This uses tenacity for robust retry logic with exponential backoff and jitter.
+    Retries go through retry_on_rate_limit with a precomputed backoff schedule.
     """
 
     def __init__(
@@ -142,6 +300,7 @@ class RetryOnRateLimitMiddleware(ChatMiddleware):
         max_retries: int = 5,
         min_wait: float = 1.0,
         max_wait: float = 60.0,
+        backoff: SharedBackoff | None = None,
     ):
         """Initialize the retry middleware.
 
@@ -149,10 +308,14 @@ class RetryOnRateLimitMiddleware(ChatMiddleware):
             max_retries: Maximum number of retry attempts.
             min_wait: Minimum wait time in seconds.
             max_wait: Maximum wait time in seconds.
+            backoff: Backoff shared with other callers. Defaults to a new instance,
+                which is still shared by all requests through this middleware.
         """
         self.max_retries = max_retries
         self.min_wait = min_wait
         self.max_wait = max_wait
+        self.backoff = backoff or SharedBackoff()
+        self._waits = backoff_schedule(max_retries, min_wait, max_wait)
 
     async def process(
         self,
@@ -160,14 +323,54 @@ class RetryOnRateLimitMiddleware(ChatMiddleware):
         next: Callable[[ChatContext], Awaitable[None]],
     ) -> None:
         """Process the chat request with retry logic for rate limiting."""
-
-        @retry(
-            retry=retry_if_exception_message(match=r"(?i)(too many requests|429)"),
-            stop=stop_after_attempt(self.max_retries + 1),
-            wait=wait_exponential_jitter(initial=self.min_wait, max=self.max_wait),
-            reraise=True,
+        if context.is_streaming:
+            # Streaming errors surface while the caller iterates the stream, after
+            # this returns, so the retry goes into the stream itself
+            context.result = self._stream_with_retry(context, next)
+            return
+
+        await retry_on_rate_limit(
+            lambda: next(context),
+            self._waits,
+            self.backoff,
+            max_wait=self.max_wait,
+            on_retry=self._log_retry,
         )
-        async def _call_with_retry() -> None:
-            await next(context)
 
-        await _call_with_retry()
+    async def _stream_with_retry(
+        self,
+        context: ChatContext,
+        next: Callable[[ChatContext], Awaitable[None]],
+    ) -> AsyncIterator[Any]:
+        """Yield the streaming response, reopening it on a rate limit.
+
+        A 429 is raised when the request is sent, before the first update, so
+        only opening the stream is retried; an error after updates have been
+        yielded propagates rather than repeating them.
+        """
+
+        async def open_stream() -> tuple[AsyncIterator[Any], Any]:
+            await next(context)
+            stream = aiter(context.result)  # type: ignore[arg-type]
+            return stream, await anext(stream, None)
+
+        stream, first = await retry_on_rate_limit(
+            open_stream,
+            self._waits,
+            self.backoff,
+            max_wait=self.max_wait,
+            on_retry=self._log_retry,
+        )
+        if first is None:
+            return
+        yield first
+        async for update in stream:
+            yield update
+
+    def _log_retry(self, error: BaseException, wait_time: float, attempt: int) -> None:
+        logger.warning(
+            "Rate limited, retrying in %.1fs (attempt %d/%d)",
+            wait_time,
+            attempt,
+            self.max_retries,
+        )
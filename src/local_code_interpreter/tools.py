@@ -8,15 +8,24 @@ These can be used with any agent configuration (OpenAI, Azure OpenAI, etc.)
 """
 
 import asyncio
+import contextlib
+import functools
+import importlib.util
 import logging
 import os
+import signal
 import sys
 import tempfile
-import uuid
-from typing import Annotated, Literal, Optional
+import threading
+from collections.abc import AsyncIterator, Callable
+from types import ModuleType
+from typing import TYPE_CHECKING, Annotated, Literal, Optional
 
 from agent_framework import AIFunction
-from pydantic import Field
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from hyperlight_nanvix import NanvixSandbox, WorkloadResult  # type: ignore[import-untyped]
 
 # Type alias for hyperlight language options
 HyperlightLanguage = Literal["javascript", "python"]
@@ -37,20 +46,16 @@ def _format_debug_output(label: str, content: str, max_preview: int = 1000) -> s
     return f"\n{'=' * 60}\n{label}\n{'=' * 60}\n{indented}{truncation_note}\n{'=' * 60}"
 
 
-# Try to import hyperlight-nanvix (optional dependency)
-try:
-    from hyperlight_nanvix import (  # type: ignore[import-untyped]
-        NanvixSandbox,
-        SandboxConfig,
-        WorkloadResult,
-    )
+# hyperlight-nanvix is an optional dependency. Only probe for it here:
+# importing it loads a large native extension, which the python
+# environment never needs, so the import is deferred to first sandbox use.
+HYPERLIGHT_AVAILABLE = importlib.util.find_spec("hyperlight_nanvix") is not None
+
 
-    HYPERLIGHT_AVAILABLE = True
-except ImportError:
-    HYPERLIGHT_AVAILABLE = False
-    NanvixSandbox = None  # type: ignore[assignment]
-    SandboxConfig = None  # type: ignore[assignment]
-    WorkloadResult = None  # type: ignore[assignment]
+@functools.cache
+def _import_hyperlight() -> ModuleType:
+    """Import hyperlight-nanvix on first use."""
+    return importlib.import_module("hyperlight_nanvix")
 
 
 # =============================================================================
@@ -59,10 +64,122 @@ except ImportError:
 
 MAX_OUTPUT_SIZE = 10000  # 10KB truncation limit
 
+# Pipe read size, also used as the StreamReader buffer limit
+_READ_SIZE = 65536
+
+# A subprocess is killed once it writes this much; only the head and tail are kept
+_MAX_READ_BYTES = 1024 * 1024
+
+
+class _PrefixSuffixBuffer:
+    """Keep the first and last ``size`` bytes written to it, counting the rest.
+
+    Memory stays bounded however much is written, while the tail of the
+    output (where tracebacks end up) is kept alongside the head.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.total = 0
+        self._prefix = bytearray()
+        self._suffix = bytearray()
+
+    def write(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.size - len(self._prefix)
+        if room > 0:
+            self._prefix += data[:room]
+            data = data[room:]
+        if data:
+            self._suffix += data
+            del self._suffix[: -self.size]
+
+    def head(self) -> bytes:
+        """Return the first ``size`` bytes written (or all of them)."""
+        return bytes(self._prefix)
+
+    def tail(self) -> bytes:
+        """Return the last ``size`` bytes written (or all of them)."""
+        return bytes((self._prefix + self._suffix)[-self.size :])
+
+
+def _render_output(buffers: list[_PrefixSuffixBuffer], limit: int) -> str:
+    """Join the buffered streams in order, keeping the head and tail if over ``limit``.
+
+    Each buffer must hold at least ``limit`` bytes at each end. The raw bytes
+    are cut before decoding; 'replace' covers a cut inside a character.
+    """
+    total = sum(buf.total for buf in buffers)
+    if total <= limit:
+        return b"".join(buf.tail() for buf in buffers).decode(errors="replace")
+    head_size = limit // 2
+    tail_size = limit - head_size
+    head = b"".join(buf.head() for buf in buffers)[:head_size]
+    tail = b"".join(buf.tail() for buf in buffers)[-tail_size:]
+    skipped = total - len(head) - len(tail)
+    return (
+        head.decode(errors="replace")
+        + f"\n... [output truncated, {skipped} bytes omitted] ...\n"
+        + tail.decode(errors="replace")
+    )
+
+
+async def _read_stream(
+    stream: asyncio.StreamReader, buf: _PrefixSuffixBuffer, on_overflow: Callable[[], None]
+) -> None:
+    """Read ``stream`` to EOF into ``buf``.
+
+    ``on_overflow`` is called once more than _MAX_READ_BYTES has been read.
+    Whatever is drained after that still goes through ``buf``, so its total
+    (and the omitted byte count reported for it) stays exact.
+    """
+    overflowed = False
+    while chunk := await stream.read(_READ_SIZE):
+        buf.write(chunk)
+        if not overflowed and buf.total > _MAX_READ_BYTES:
+            overflowed = True
+            on_overflow()
+
+
+def _kill_process_tree(proc: asyncio.subprocess.Process) -> None:
+    """Kill ``proc`` and, on POSIX, every process it spawned.
+
+    Children are started in their own session, so the whole process group
+    can be killed; otherwise grandchildren (e.g. shell pipelines) would
+    survive and keep the output pipes open.
+    """
+    if sys.platform != "win32":
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        return
+    try:
+        proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def _kill_and_reap(proc: asyncio.subprocess.Process) -> None:
+    """Kill ``proc``'s process tree and wait briefly for it to be reaped.
+
+    If it does not exit in time (e.g. stuck in uninterruptible I/O), the
+    event loop's child watcher still reaps it once it exits.
+    """
+    _kill_process_tree(proc)
+    try:
+        await asyncio.wait_for(proc.wait(), timeout=5)
+    except asyncio.TimeoutError:
+        logger.warning("Timed-out subprocess %d did not exit after SIGKILL", proc.pid)
+
 
 async def _run_python(code: str, timeout: int) -> str:
     """Execute Python code in a sandboxed subprocess.
 
+    Output is read as it is produced rather than buffered in full; only its
+    head and tail are kept, and a process that keeps writing past
+    _MAX_READ_BYTES is killed.
+
     Args:
         code: Python code to execute.
         timeout: Execution timeout in seconds.
@@ -70,7 +187,7 @@ async def _run_python(code: str, timeout: int) -> str:
     Returns:
         The combined stdout and stderr output, truncated if necessary.
     """
-    logger.debug(f"Executing Python code:\n{code}")
+    logger.debug("Executing Python code:\n%s", code)
 
     # Use sys.executable to get the absolute path to the Python interpreter
     # This avoids needing PATH in the environment
@@ -81,30 +198,104 @@ async def _run_python(code: str, timeout: int) -> str:
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
         env={},  # Stripped environment for security
+        limit=_READ_SIZE,
+        # Own process group, so a timeout can kill anything the code spawns
+        start_new_session=sys.platform != "win32",
     )
+    assert proc.stdout is not None and proc.stderr is not None
+
+    stdout = _PrefixSuffixBuffer(MAX_OUTPUT_SIZE)
+    stderr = _PrefixSuffixBuffer(MAX_OUTPUT_SIZE)
+    overflowed = False
+
+    def on_overflow() -> None:
+        nonlocal overflowed
+        overflowed = True
+        _kill_process_tree(proc)
+
     try:
-        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
-        stdout_str = stdout.decode()
-        stderr_str = stderr.decode()
-        logger.debug(f"stdout: {stdout_str!r}")
-        logger.debug(f"stderr: {stderr_str!r}")
-        output = stdout_str + stderr_str
-        if len(output) > MAX_OUTPUT_SIZE:
-            return output[:MAX_OUTPUT_SIZE] + "\n... [output truncated]"
+        await asyncio.wait_for(
+            asyncio.gather(
+                _read_stream(proc.stdout, stdout, on_overflow),
+                _read_stream(proc.stderr, stderr, on_overflow),
+                proc.wait(),
+            ),
+            timeout=timeout,
+        )
+        logger.debug("stdout: %d bytes, stderr: %d bytes", stdout.total, stderr.total)
+        output = _render_output([stdout, stderr], MAX_OUTPUT_SIZE)
+        if overflowed:
+            output += f"\nProcess killed: output exceeded {_MAX_READ_BYTES >> 20} MiB"
         return output
     except asyncio.TimeoutError:
-        proc.kill()
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=5)
-        except asyncio.TimeoutError:
-            pass
+        await _kill_and_reap(proc)
         return f"Error: Execution timed out after {timeout}s"
 
 
+# Hyperlight writes to the process-wide fd 1, so only one run may capture it at
+# a time, whichever event loop it runs on
+_STDOUT_CAPTURE_LOCK = threading.Lock()
+
+
+@contextlib.asynccontextmanager
+async def _hold(lock: threading.Lock) -> AsyncIterator[None]:
+    """Hold a threading lock from async code without blocking the event loop.
+
+    Unlike asyncio.Lock, a threading lock is not bound to one event loop, so
+    tools cached across loops (or shared with worker threads) keep working.
+    A contended lock is waited for in a worker thread.
+    """
+    if not lock.acquire(blocking=False):
+        acquiring = asyncio.ensure_future(asyncio.to_thread(lock.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The worker still takes the lock; hand it back once it does
+            acquiring.add_done_callback(lambda _: lock.release())
+            raise
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def _drain_fd(fd: int, buf: _PrefixSuffixBuffer) -> None:
+    """Read ``fd`` to EOF into ``buf``."""
+    while chunk := os.read(fd, _READ_SIZE):
+        buf.write(chunk)
+
+
+def _default_workload_base() -> str:
+    """Return the base directory for workload files, preferring RAM-backed /dev/shm."""
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def _write_workload(workload_dir: str, filename: str, code: str) -> str:
+    """Write ``code`` to a new workload file and return its path."""
+    path = os.path.join(workload_dir, filename)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+    try:
+        fd = os.open(path, flags, 0o600)
+    except FileNotFoundError:
+        # The directory is created up front, but tmp cleaners may remove it
+        os.makedirs(workload_dir, exist_ok=True)
+        fd = os.open(path, flags, 0o600)
+    try:
+        # os.write may write less than asked, so loop until everything is out
+        view = memoryview(code.encode())
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+    return path
+
+
 async def _run_hyperlight(
     code: str,
     sandbox: "NanvixSandbox",
-    tmp_directory: str,
+    workload_dir: str,
     language: HyperlightLanguage = "javascript",
 ) -> str:
     """Execute code in a hyperlight-nanvix VM sandbox.
@@ -112,64 +303,64 @@ async def _run_hyperlight(
     Args:
         code: The code to execute.
         sandbox: The NanvixSandbox instance.
-        tmp_directory: Directory for temporary files.
+        workload_dir: Directory the workload file is written to.
         language: The language of the code - 'javascript' or 'python'.
 
     Returns:
         The execution output or error message.
     """
-    workload_dir = os.path.join(tmp_directory, "hyperlight-workloads")
-    os.makedirs(workload_dir, exist_ok=True)
-
     # Use appropriate file extension based on language
     extension = "py" if language == "python" else "js"
-    filename = f"workload_{uuid.uuid4().hex[:8]}.{extension}"
-    workload_path = os.path.join(workload_dir, filename)
-    stdout_capture_path = os.path.join(tmp_directory, f"stdout_{uuid.uuid4().hex[:8]}.txt")
+    filename = f"workload_{os.urandom(4).hex()}.{extension}"
+    workload_path: str | None = None
 
     try:
-        with open(workload_path, "w") as f:
-            f.write(code)
-
-        # Capture stdout at fd level since hyperlight writes directly to fd 1
-        original_stdout_fd = os.dup(1)
-        try:
-            with open(stdout_capture_path, "w") as capture_file:
-                os.dup2(capture_file.fileno(), 1)
-                sys.stdout.flush()
+        workload_path = _write_workload(workload_dir, filename, code)
+
+        # Capture stdout at fd level since hyperlight writes directly to fd 1.
+        # A thread drains the pipe while the sandbox runs, so it never fills up.
+        captured = _PrefixSuffixBuffer(MAX_OUTPUT_SIZE)
+        async with _hold(_STDOUT_CAPTURE_LOCK):
+            read_fd, write_fd = os.pipe()
+            reader = threading.Thread(target=_drain_fd, args=(read_fd, captured), daemon=True)
+            reader.start()
+            try:
+                original_stdout_fd = os.dup(1)
                 try:
-                    result: WorkloadResult = await sandbox.run(workload_path)
-                finally:
                     sys.stdout.flush()
-                    os.dup2(original_stdout_fd, 1)
+                    os.dup2(write_fd, 1)
+                    try:
+                        result: WorkloadResult = await sandbox.run(workload_path)
+                    finally:
+                        sys.stdout.flush()
+                        os.dup2(original_stdout_fd, 1)
+                finally:
+                    os.close(original_stdout_fd)
+            finally:
+                # Closing the last write end lets the reader hit EOF
+                os.close(write_fd)
+                reader.join()
+                os.close(read_fd)
 
-            with open(stdout_capture_path, "r") as f:
-                captured_stdout = f.read().strip()
-        finally:
-            os.close(original_stdout_fd)
-            if os.path.exists(stdout_capture_path):
-                try:
-                    os.remove(stdout_capture_path)
-                except OSError:
-                    pass
+        captured_stdout = _render_output([captured], MAX_OUTPUT_SIZE).strip()
 
         if result.success:
             return captured_stdout if captured_stdout else "Execution completed successfully."
         else:
             error_msg = result.error or "Unknown error"
-            logger.error(f"Hyperlight execution failed: {error_msg}")
+            logger.error("Hyperlight execution failed: %s", error_msg)
             return f"Execution failed: {error_msg}"
 
     except Exception as e:
-        logger.exception(f"Exception during hyperlight sandbox execution: {e}")
+        logger.exception("Exception during hyperlight sandbox execution: %s", e)
         return f"Error during sandbox execution: {e}"
 
     finally:
-        try:
-            if os.path.exists(workload_path):
-                os.remove(workload_path)
-        except OSError:
-            pass
+        if workload_path is not None:
+            try:
+                os.unlink(workload_path)
+            except OSError:
+                pass
 
 
 # =============================================================================
@@ -177,6 +368,10 @@ async def _run_hyperlight(
 # =============================================================================
 
 
+# Tool class -> pydantic input model inferred from its _execute signature
+_INPUT_MODELS: dict[type, type[BaseModel]] = {}
+
+
 class CodeExecutionTool(AIFunction):
     """A tool for executing code in a sandboxed environment.
 
@@ -230,6 +425,7 @@ class CodeExecutionTool(AIFunction):
             timeout: Execution timeout in seconds (python env only). Defaults to 30.
             log_directory: Directory for sandbox logs (hyperlight env only).
             tmp_directory: Directory for temporary files (hyperlight env only).
+                Workload files default to /dev/shm when it is available.
             hyperlight_language: Language for hyperlight env - 'javascript' or 'python'.
                 Defaults to 'javascript'. Only used when environment='hyperlight'.
             approval_mode: Whether approval is required. Defaults to "always_require".
@@ -243,6 +439,10 @@ class CodeExecutionTool(AIFunction):
         self.tmp_directory = tmp_directory or tempfile.gettempdir()
         self.hyperlight_language = hyperlight_language
         self._sandbox: Optional["NanvixSandbox"] = None
+        # Agents share tool instances, so serialize runs on the shared sandbox
+        self._hyperlight_lock = threading.Lock()
+        # prewarm() may create the sandbox from a worker thread
+        self._sandbox_init_lock = threading.Lock()
 
         if environment == "hyperlight" and not HYPERLIGHT_AVAILABLE:
             raise ImportError(
@@ -251,6 +451,11 @@ class CodeExecutionTool(AIFunction):
             )
 
         if environment == "hyperlight":
+            # Created once here rather than on every run
+            self._workload_dir = os.path.join(
+                tmp_directory or _default_workload_base(), "hyperlight-workloads"
+            )
+            os.makedirs(self._workload_dir, exist_ok=True)
             lang_name = "Python" if hyperlight_language == "python" else "JavaScript"
             description = (
                 f"Execute {lang_name} code in a secure hyperlight-nanvix sandbox "
@@ -262,6 +467,13 @@ class CodeExecutionTool(AIFunction):
                 "Use for calculations, testing code snippets, or verifying logic."
             )
 
+        # Building the input model from the _execute signature is the bulk of
+        # AIFunction's setup; it is the same for every instance, so reuse it
+        cls = type(self)
+        custom_input_model = "input_model" in kwargs
+        if not custom_input_model and cls in _INPUT_MODELS:
+            kwargs["input_model"] = _INPUT_MODELS[cls]
+
         super().__init__(
             name="execute_code",
             description=description,
@@ -269,20 +481,41 @@ class CodeExecutionTool(AIFunction):
             func=self._execute,
             **kwargs,
         )
+        if not custom_input_model:
+            _INPUT_MODELS.setdefault(cls, self.input_model)
 
     def _get_sandbox(self) -> "NanvixSandbox":
         """Get or create the hyperlight sandbox instance."""
-        if self._sandbox is None:
-            try:
-                config = SandboxConfig(
-                    log_directory=self.log_directory,
-                    tmp_directory=self.tmp_directory,
-                )
-                self._sandbox = NanvixSandbox(config)
-            except Exception as e:
-                logger.exception(f"Failed to create NanvixSandbox: {e}")
-                raise
-        return self._sandbox
+        sandbox = self._sandbox
+        if sandbox is None:
+            with self._sandbox_init_lock:
+                sandbox = self._sandbox
+                if sandbox is None:
+                    try:
+                        hyperlight = _import_hyperlight()
+                        config = hyperlight.SandboxConfig(
+                            log_directory=self.log_directory,
+                            tmp_directory=self.tmp_directory,
+                        )
+                        sandbox = self._sandbox = hyperlight.NanvixSandbox(config)
+                    except Exception as e:
+                        logger.exception("Failed to create NanvixSandbox: %s", e)
+                        raise
+        return sandbox
+
+    async def _get_sandbox_async(self) -> "NanvixSandbox":
+        """Get the sandbox, creating it (or waiting for prewarm()) off the event loop."""
+        if self._sandbox is not None:
+            return self._sandbox
+        return await asyncio.to_thread(self._get_sandbox)
+
+    def prewarm(self) -> None:
+        """Create the hyperlight sandbox eagerly so the first call skips setup.
+
+        Safe to call from a worker thread. No-op for the python environment.
+        """
+        if self.environment == "hyperlight":
+            self._get_sandbox()
 
     async def _execute(
         self,
@@ -301,10 +534,11 @@ class CodeExecutionTool(AIFunction):
 
         try:
             if self.environment == "hyperlight":
-                sandbox = self._get_sandbox()
-                result = await _run_hyperlight(
-                    code, sandbox, self.tmp_directory, self.hyperlight_language
-                )
+                async with _hold(self._hyperlight_lock):
+                    sandbox = await self._get_sandbox_async()
+                    result = await _run_hyperlight(
+                        code, sandbox, self._workload_dir, self.hyperlight_language
+                    )
             else:
                 result = await _run_python(code, self.timeout)
 
@@ -327,8 +561,9 @@ class CodeExecutionTool(AIFunction):
             return "Cache clearing only applicable for hyperlight environment."
 
         try:
-            sandbox = self._get_sandbox()
-            await sandbox.clear_cache()
+            async with _hold(self._hyperlight_lock):
+                sandbox = await self._get_sandbox_async()
+                await sandbox.clear_cache()
             return "Cache cleared successfully."
         except Exception as e:
             return f"Failed to clear cache: {e}"
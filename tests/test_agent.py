@@ -0,0 +1,58 @@
+"""Tests for Local Code Interpreter agent CLI helpers"""
+
+import io
+from types import SimpleNamespace
+
+import pytest
+from agent_framework.exceptions import ServiceResponseException
+
+from local_code_interpreter.agent import _get_response_cache_ttl, run_streaming_with_retry
+from local_code_interpreter.cache import DEFAULT_RESPONSE_CACHE_TTL
+from local_code_interpreter.shared import RetryOnRateLimitMiddleware, SharedBackoff
+
+
+class TestGetResponseCacheTtl:
+    """Tests for reading RESPONSE_CACHE_TTL."""
+
+    def test_uses_configured_seconds(self, monkeypatch):
+        monkeypatch.setenv("RESPONSE_CACHE_TTL", "60")
+        assert _get_response_cache_ttl() == 60.0
+
+    def test_defaults_when_unset(self, monkeypatch):
+        monkeypatch.delenv("RESPONSE_CACHE_TTL", raising=False)
+        assert _get_response_cache_ttl() == DEFAULT_RESPONSE_CACHE_TTL
+
+    def test_invalid_value_falls_back_to_default(self, monkeypatch):
+        monkeypatch.setenv("RESPONSE_CACHE_TTL", "1 day")
+        assert _get_response_cache_ttl() == DEFAULT_RESPONSE_CACHE_TTL
+
+
+def _rate_limited_agent(middleware):
+    calls = []
+
+    async def run_stream(query):
+        calls.append(query)
+        raise ServiceResponseException("Error code: 429")
+        yield  # pragma: no cover
+
+    return SimpleNamespace(run_stream=run_stream, middleware=middleware), calls
+
+
+class TestRunStreamingWithRetry:
+    """Tests for the outer streaming retry layer."""
+
+    async def test_retries_agents_without_retry_middleware(self):
+        agent, calls = _rate_limited_agent(None)
+        with pytest.raises(ServiceResponseException):
+            await run_streaming_with_retry(
+                agent, "q", max_retries=2, min_wait=0.0, backoff=SharedBackoff(), out=io.StringIO()
+            )
+        assert len(calls) == 3
+
+    async def test_leaves_retries_to_the_middleware(self):
+        agent, calls = _rate_limited_agent([RetryOnRateLimitMiddleware()])
+        with pytest.raises(ServiceResponseException):
+            await run_streaming_with_retry(
+                agent, "q", max_retries=2, min_wait=0.0, backoff=SharedBackoff(), out=io.StringIO()
+            )
+        assert len(calls) == 1
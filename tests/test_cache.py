@@ -0,0 +1,133 @@
+"""Tests for the response cache."""
+
+from local_code_interpreter import cache as cache_module
+from local_code_interpreter.cache import (
+    DEFAULT_RESPONSE_CACHE_TTL,
+    ResponseCache,
+    SQLiteResponseCache,
+    make_cache_key,
+    open_response_cache,
+)
+
+
+class TestMakeCacheKey:
+    """Tests for make_cache_key helper."""
+
+    def test_same_inputs_give_same_key(self):
+        assert make_cache_key("m", "i", "q") == make_cache_key("m", "i", "q")
+
+    def test_fields_are_separated(self):
+        assert make_cache_key("ab", "c", "q") != make_cache_key("a", "bc", "q")
+
+    def test_surrounding_whitespace_shares_a_key(self):
+        assert make_cache_key("m", "i", "  What is  \n2^100? \n") == make_cache_key(
+            "m", "i", "What is\n2^100?"
+        )
+
+    def test_indentation_is_significant(self):
+        inside = "Run this:\nif x:\n    y()\n    z()"
+        outside = "Run this:\nif x:\n    y()\nz()"
+        assert make_cache_key("m", "i", inside) != make_cache_key("m", "i", outside)
+
+    def test_case_is_significant(self):
+        assert make_cache_key("m", "i", "print X") != make_cache_key("m", "i", "print x")
+
+
+class TestResponseCache:
+    """Tests for ResponseCache."""
+
+    def test_miss_returns_none(self):
+        assert ResponseCache().get("missing") is None
+
+    def test_set_then_get(self):
+        cache = ResponseCache()
+        cache.set("k", "hello")
+        assert cache.get("k") == "hello"
+
+    def test_evicts_least_recently_used(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+        assert cache.get("c") == "3"
+
+    def test_expired_entry_is_a_miss(self):
+        cache = ResponseCache(ttl=0)
+        cache._entries["k"] = (0.0, "stale")
+        assert cache.get("k") is None
+        assert len(cache) == 0
+
+    def test_persists_to_path(self, tmp_path):
+        path = str(tmp_path / "cache" / "llm_cache.json")
+        ResponseCache(path=path).set("k", "hello")
+        assert ResponseCache(path=path).get("k") == "hello"
+
+    def test_ignores_corrupt_file(self, tmp_path):
+        path = tmp_path / "llm_cache.json"
+        path.write_text("not json")
+        assert len(ResponseCache(path=str(path))) == 0
+
+    def test_persists_without_orjson(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(cache_module, "orjson", None)
+        path = str(tmp_path / "llm_cache.json")
+        ResponseCache(path=path).set("k", "hello")
+        assert ResponseCache(path=path).get("k") == "hello"
+
+
+class TestSQLiteResponseCache:
+    """Tests for SQLiteResponseCache."""
+
+    def test_set_then_get(self, tmp_path):
+        cache = SQLiteResponseCache(str(tmp_path / "cache.db"))
+        cache.set("k", "hello")
+        assert cache.get("k") == "hello"
+        assert cache.get("missing") is None
+        cache.close()
+
+    def test_persists_across_connections(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteResponseCache(path)
+        cache.set("k", "hello")
+        cache.close()
+        reopened = SQLiteResponseCache(path)
+        assert reopened.get("k") == "hello"
+        reopened.close()
+
+    def test_stores_compressed(self, tmp_path):
+        cache = SQLiteResponseCache(str(tmp_path / "cache.db"))
+        cache.set("k", "hello " * 100)
+        (stored,) = cache._conn.execute("SELECT data FROM responses").fetchone()
+        assert isinstance(stored, bytes) and len(stored) < 600
+        assert cache.get("k") == "hello " * 100
+        cache.close()
+
+    def test_expired_entry_is_a_miss(self, tmp_path):
+        cache = SQLiteResponseCache(str(tmp_path / "cache.db"), ttl=-1)
+        cache.set("k", "stale")
+        assert cache.get("k") is None
+        assert len(cache) == 0
+        cache.close()
+
+
+class TestOpenResponseCache:
+    """Tests for open_response_cache factory."""
+
+    def test_db_suffix_uses_sqlite(self, tmp_path):
+        cache = open_response_cache(str(tmp_path / "cache.db"))
+        assert isinstance(cache, SQLiteResponseCache)
+        cache.close()
+
+    def test_other_suffix_uses_json(self, tmp_path):
+        assert isinstance(open_response_cache(str(tmp_path / "cache.json")), ResponseCache)
+
+    def test_applies_default_ttl(self, tmp_path):
+        cache = open_response_cache(str(tmp_path / "cache.json"))
+        assert cache.ttl == DEFAULT_RESPONSE_CACHE_TTL
+
+    def test_passes_ttl_to_store(self, tmp_path):
+        cache = open_response_cache(str(tmp_path / "cache.db"), ttl=60)
+        assert cache.ttl == 60
+        cache.close()
@@ -0,0 +1,294 @@
+"""Tests for Local Code Interpreter shared components"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from local_code_interpreter.shared import (
+    INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS,
+    INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY,
+    INTERPRETER_AGENT_INSTRUCTIONS_PYTHON,
+    RetryOnRateLimitMiddleware,
+    SharedBackoff,
+    _mark_rate_limit_final,
+    backoff_schedule,
+    get_instructions,
+    get_prompt_cache_key,
+    is_rate_limit_error,
+    retry_on_rate_limit,
+    with_jitter,
+    without_sdk_rate_limit_retries,
+)
+
+
+class TestGetInstructions:
+    """Tests for get_instructions helper."""
+
+    def test_returns_python_instructions_for_python_environment(self):
+        assert get_instructions("python") == INTERPRETER_AGENT_INSTRUCTIONS_PYTHON
+
+    def test_python_environment_ignores_hyperlight_language(self):
+        assert get_instructions("python", "python") == INTERPRETER_AGENT_INSTRUCTIONS_PYTHON
+
+    def test_returns_javascript_instructions_for_hyperlight_default(self):
+        assert get_instructions("hyperlight") == INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS
+
+    def test_returns_javascript_instructions_for_hyperlight_javascript(self):
+        result = get_instructions("hyperlight", "javascript")
+        assert result == INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS
+
+    def test_returns_python_instructions_for_hyperlight_python(self):
+        result = get_instructions("hyperlight", "python")
+        assert result == INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY
+
+    def test_unknown_environment_falls_back_to_python(self):
+        assert get_instructions("other") == INTERPRETER_AGENT_INSTRUCTIONS_PYTHON
+
+    def test_instructions_share_a_common_prefix(self):
+        prefix = INTERPRETER_AGENT_INSTRUCTIONS_PYTHON.split("Your capabilities include:")[0]
+        assert INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS.startswith(prefix)
+        assert INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_PY.startswith(prefix)
+
+
+class TestGetPromptCacheKey:
+    """Tests for get_prompt_cache_key helper."""
+
+    def test_is_stable_for_same_instructions(self):
+        key = get_prompt_cache_key(INTERPRETER_AGENT_INSTRUCTIONS_PYTHON)
+        assert key == get_prompt_cache_key(INTERPRETER_AGENT_INSTRUCTIONS_PYTHON)
+
+    def test_differs_between_instructions(self):
+        assert get_prompt_cache_key(INTERPRETER_AGENT_INSTRUCTIONS_PYTHON) != get_prompt_cache_key(
+            INTERPRETER_AGENT_INSTRUCTIONS_HYPERLIGHT_JS
+        )
+
+
+class TestIsRateLimitError:
+    """Tests for is_rate_limit_error helper."""
+
+    def test_detects_429_status(self):
+        assert is_rate_limit_error(Exception("Error code: 429 - rate limited"))
+
+    def test_detects_too_many_requests_case_insensitive(self):
+        assert is_rate_limit_error(Exception("Too Many Requests"))
+
+    def test_ignores_other_errors(self):
+        assert not is_rate_limit_error(Exception("Internal server error"))
+
+    def test_detects_status_code_attribute(self):
+        error = Exception("upstream error")
+        error.status_code = 429  # type: ignore[attr-defined]
+        assert is_rate_limit_error(error)
+
+
+class TestBackoffSchedule:
+    """Tests for backoff_schedule helper."""
+
+    def test_doubles_each_attempt(self):
+        assert backoff_schedule(4, 1.0, 60.0) == (1.0, 2.0, 4.0, 8.0)
+
+    def test_caps_at_max_wait(self):
+        assert backoff_schedule(5, 2.0, 10.0) == (2.0, 4.0, 8.0, 10.0, 10.0)
+
+    def test_empty_when_no_retries(self):
+        assert backoff_schedule(0, 1.0, 60.0) == ()
+
+
+class TestWithJitter:
+    """Tests for with_jitter helper."""
+
+    def test_adds_at_most_ten_percent(self):
+        for _ in range(100):
+            assert 10.0 <= with_jitter(10.0) <= 11.0
+
+    def test_zero_stays_zero(self):
+        assert with_jitter(0.0) == 0.0
+
+
+class TestSharedBackoff:
+    """Tests for SharedBackoff."""
+
+    async def test_wait_returns_immediately_without_backoff(self):
+        backoff = SharedBackoff()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await backoff.wait()
+        assert loop.time() - start < 0.05
+
+    async def test_concurrent_sleepers_share_one_deadline(self):
+        backoff = SharedBackoff()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        finished: list[float] = []
+
+        async def sleeper(seconds: float) -> None:
+            await backoff.sleep(seconds)
+            finished.append(loop.time() - start)
+
+        await asyncio.gather(sleeper(0.2), sleeper(0.05))
+        # The short sleeper is held until the longer deadline
+        assert min(finished) >= 0.15
+
+    async def test_wait_blocks_until_deadline(self):
+        backoff = SharedBackoff()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        sleeper = asyncio.create_task(backoff.sleep(0.1))
+        await asyncio.sleep(0)
+        await backoff.wait()
+        assert loop.time() - start >= 0.09
+        await sleeper
+
+    async def test_tiny_sleep_only_yields(self, monkeypatch):
+        delays: list[float] = []
+        real_sleep = asyncio.sleep
+
+        async def recording_sleep(delay: float) -> None:
+            delays.append(delay)
+            await real_sleep(0)
+
+        monkeypatch.setattr(asyncio, "sleep", recording_sleep)
+        await SharedBackoff().sleep(0.0001)
+        assert delays == [0]
+
+
+class TestRetryOnRateLimit:
+    """Tests for retry_on_rate_limit helper."""
+
+    async def test_returns_result_after_retries(self):
+        attempts: list[int] = []
+        retries: list[int] = []
+
+        async def call() -> str:
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise RuntimeError("429")
+            return "ok"
+
+        result = await retry_on_rate_limit(
+            call,
+            (0.0, 0.0, 0.0),
+            SharedBackoff(),
+            on_retry=lambda error, wait, attempt: retries.append(attempt),
+        )
+        assert result == "ok"
+        assert retries == [1, 2]
+
+    async def test_only_retries_listed_exceptions(self):
+        attempts: list[int] = []
+
+        async def call() -> None:
+            attempts.append(1)
+            raise RuntimeError("429")
+
+        with pytest.raises(RuntimeError):
+            await retry_on_rate_limit(call, (0.0, 0.0), SharedBackoff(), exceptions=ValueError)
+        assert len(attempts) == 1
+
+
+class TestRetryOnRateLimitMiddleware:
+    """Tests for RetryOnRateLimitMiddleware."""
+
+    async def test_retries_on_429_error(self):
+        middleware = RetryOnRateLimitMiddleware(max_retries=3, min_wait=0.0, max_wait=0.0)
+        calls = 0
+
+        async def next_(context):
+            nonlocal calls
+            calls += 1
+            if calls < 3:
+                raise RuntimeError("Error 429: Too Many Requests")
+
+        await middleware.process(SimpleNamespace(is_streaming=False), next_)
+        assert calls == 3
+
+    async def test_raises_after_max_retries(self):
+        middleware = RetryOnRateLimitMiddleware(max_retries=2, min_wait=0.0, max_wait=0.0)
+        calls = 0
+
+        async def next_(context):
+            nonlocal calls
+            calls += 1
+            raise RuntimeError("429")
+
+        with pytest.raises(RuntimeError):
+            await middleware.process(SimpleNamespace(is_streaming=False), next_)
+        assert calls == 3
+
+    async def test_does_not_retry_other_errors(self):
+        middleware = RetryOnRateLimitMiddleware(max_retries=3, min_wait=0.0, max_wait=0.0)
+        calls = 0
+
+        async def next_(context):
+            nonlocal calls
+            calls += 1
+            raise ValueError("bad request")
+
+        with pytest.raises(ValueError):
+            await middleware.process(SimpleNamespace(is_streaming=False), next_)
+        assert calls == 1
+
+    async def test_retries_streaming_call_before_first_update(self):
+        middleware = RetryOnRateLimitMiddleware(max_retries=3, min_wait=0.0, max_wait=0.0)
+        context = SimpleNamespace(is_streaming=True, result=None)
+        calls = 0
+
+        async def stream(attempt):
+            if attempt < 3:
+                raise RuntimeError("Error 429: Too Many Requests")
+            yield "a"
+            yield "b"
+
+        async def next_(context):
+            nonlocal calls
+            calls += 1
+            context.result = stream(calls)
+
+        await middleware.process(context, next_)
+        assert calls == 0
+        assert [update async for update in context.result] == ["a", "b"]
+        assert calls == 3
+
+    async def test_does_not_retry_stream_after_first_update(self):
+        middleware = RetryOnRateLimitMiddleware(max_retries=3, min_wait=0.0, max_wait=0.0)
+        context = SimpleNamespace(is_streaming=True, result=None)
+        calls = 0
+        received = []
+
+        async def stream():
+            yield "a"
+            raise RuntimeError("429")
+
+        async def next_(context):
+            nonlocal calls
+            calls += 1
+            context.result = stream()
+
+        await middleware.process(context, next_)
+        with pytest.raises(RuntimeError):
+            async for update in context.result:
+                received.append(update)
+        assert received == ["a"]
+        assert calls == 1
+
+
+class TestWithoutSdkRateLimitRetries:
+    """Tests for without_sdk_rate_limit_retries."""
+
+    async def test_sdk_skips_retrying_rate_limits_only(self):
+        sdk = openai.AsyncOpenAI(api_key="test")
+        rate_limited = httpx.Response(429)
+        server_error = httpx.Response(503)
+        await _mark_rate_limit_final(rate_limited)
+        await _mark_rate_limit_final(server_error)
+        assert not sdk._should_retry(rate_limited)
+        assert sdk._should_retry(server_error)
+
+    def test_installs_hook_and_keeps_sdk_retries(self):
+        client = SimpleNamespace(client=openai.AsyncOpenAI(api_key="test"))
+        assert without_sdk_rate_limit_retries(client) is client
+        assert client.client.max_retries == openai.DEFAULT_MAX_RETRIES
+        assert _mark_rate_limit_final in client.client._client.event_hooks["response"]
@@ -1,10 +1,22 @@
 """Tests for Local Code Interpreter Tools"""
 
+import asyncio
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
 import pytest
 
 from local_code_interpreter.tools import (
-    CodeExecutionTool,
+    _MAX_READ_BYTES,
     HYPERLIGHT_AVAILABLE,
+    CodeExecutionTool,
+    _hold,
+    _PrefixSuffixBuffer,
+    _read_stream,
+    _render_output,
+    _run_hyperlight,
     _run_python,
 )
 
@@ -12,42 +24,228 @@ from local_code_interpreter.tools import (
 class TestRunPython:
     """Tests for _run_python backend function."""
 
-    @pytest.mark.asyncio
-    async def test_executes_simple_code(self):
-        result = await _run_python("print('hello world')", timeout=5)
-        assert "hello world" in result
-
-    @pytest.mark.asyncio
-    async def test_captures_stdout(self):
-        result = await _run_python("print('stdout test')", timeout=5)
-        assert "stdout test" in result
+    pytestmark = pytest.mark.integration
 
-    @pytest.mark.asyncio
-    async def test_captures_stderr(self):
-        result = await _run_python("import sys; sys.stderr.write('stderr test')", timeout=5)
-        assert "stderr test" in result
+    async def test_executes_and_captures_output_concurrently(self):
+        # Independent runs overlap their interpreter start-up
+        simple, stdout, stderr = await asyncio.gather(
+            _run_python("print('hello world')", timeout=5),
+            _run_python("print('stdout test')", timeout=5),
+            _run_python("import sys; sys.stderr.write('stderr test')", timeout=5),
+        )
+        assert "hello world" in simple
+        assert "stdout test" in stdout
+        assert "stderr test" in stderr
 
-    @pytest.mark.asyncio
     async def test_timeout_kills_process(self):
         result = await _run_python("import time; time.sleep(10)", timeout=1)
-        assert "timed out" in result.lower()
+        assert "timed out" in result
         assert "1s" in result
 
-    @pytest.mark.asyncio
+    async def test_timeout_reaps_process(self, monkeypatch):
+        procs = []
+        original = asyncio.create_subprocess_exec
+
+        async def spy(*args, **kwargs):
+            procs.append(await original(*args, **kwargs))
+            return procs[-1]
+
+        monkeypatch.setattr(asyncio, "create_subprocess_exec", spy)
+        await _run_python("import time; time.sleep(10)", timeout=1)
+        assert procs[0].returncode is not None
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="process groups are POSIX-only")
+    async def test_timeout_kills_spawned_children(self, tmp_path):
+        marker = tmp_path / "grandchild-survived"
+        grandchild = f"import time; time.sleep(2); open({str(marker)!r}, 'w').close()"
+        code = (
+            "import subprocess, sys, time\n"
+            f"subprocess.Popen([sys.executable, '-c', {grandchild!r}])\n"
+            "time.sleep(10)"
+        )
+        result = await _run_python(code, timeout=1)
+        assert "timed out" in result
+        await asyncio.sleep(2.5)
+        assert not marker.exists()
+
     async def test_handles_syntax_error(self):
         result = await _run_python("this is not valid python!", timeout=5)
         assert "SyntaxError" in result or "Error" in result
 
-    @pytest.mark.asyncio
     async def test_handles_runtime_error(self):
         result = await _run_python("raise ValueError('test error')", timeout=5)
         assert "ValueError" in result or "test error" in result
 
-    @pytest.mark.asyncio
-    async def test_truncates_large_output(self):
-        result = await _run_python("print('x' * 20000)", timeout=5)
+    @pytest.mark.parametrize("size", [10_000, 10_500])
+    async def test_truncates_large_output(self, size):
+        # print() adds a newline, so both sizes are just over the 10KB limit
+        result = await _run_python(f"print('x' * {size})", timeout=5)
         assert len(result) <= 10100  # 10KB + truncation message
-        assert "truncated" in result.lower()
+        assert "truncated" in result
+
+    async def test_keeps_output_at_limit(self):
+        result = await _run_python("print('x' * 9_999)", timeout=5)
+        assert result == "x" * 9_999 + "\n"
+
+    async def test_truncates_multibyte_output(self):
+        result = await _run_python("print('\\u00e9' * 20000)", timeout=5)
+        assert result.startswith("\u00e9" * 100)
+        assert "truncated" in result
+
+    async def test_truncation_keeps_traceback(self):
+        result = await _run_python("print('x' * 20000); raise ValueError('at the end')", timeout=5)
+        assert "truncated" in result
+        assert result.startswith("x" * 100)
+        assert "ValueError: at the end" in result
+
+    async def test_stops_runaway_output(self):
+        result = await _run_python("while True: print('x' * 1000)", timeout=10)
+        assert "truncated" in result
+        assert result.endswith("Process killed: output exceeded 1 MiB")
+        assert "timed out" not in result.lower()
+
+
+class TestReadStream:
+    """Tests for draining a subprocess stream."""
+
+    async def test_counts_output_drained_after_overflow(self):
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"x" * (_MAX_READ_BYTES + 100_000))
+        stream.feed_eof()
+        buf = _PrefixSuffixBuffer(10)
+        overflows = []
+        await _read_stream(stream, buf, lambda: overflows.append(1))
+        assert buf.total == _MAX_READ_BYTES + 100_000
+        assert overflows == [1]
+
+
+class TestPrefixSuffixBuffer:
+    """Tests for the head/tail output buffer."""
+
+    def test_keeps_everything_when_small(self):
+        buf = _PrefixSuffixBuffer(4)
+        buf.write(b"abc")
+        buf.write(b"de")
+        assert (buf.head(), buf.tail(), buf.total) == (b"abcd", b"bcde", 5)
+
+    def test_keeps_head_and_tail(self):
+        buf = _PrefixSuffixBuffer(2)
+        for chunk in (b"ab", b"cd", b"efg"):
+            buf.write(chunk)
+        assert (buf.head(), buf.tail(), buf.total) == (b"ab", b"fg", 7)
+
+    def test_render_joins_streams_in_order(self):
+        out, err = _PrefixSuffixBuffer(10), _PrefixSuffixBuffer(10)
+        out.write(b"out ")
+        err.write(b"err")
+        assert _render_output([out, err], 10) == "out err"
+
+    def test_render_truncates_middle(self):
+        out, err = _PrefixSuffixBuffer(10), _PrefixSuffixBuffer(10)
+        out.write(b"a" * 20)
+        err.write(b"Error")
+        assert (
+            _render_output([out, err], 10)
+            == "aaaaa\n... [output truncated, 15 bytes omitted] ...\nError"
+        )
+
+
+class FakeSandbox:
+    """Stands in for NanvixSandbox, writing to fd 1 like the real VM does."""
+
+    def __init__(self, output: bytes, success: bool = True, error: str | None = None):
+        self.output = output
+        self.result = SimpleNamespace(success=success, error=error)
+        self.paths: list[str] = []
+
+    async def run(self, path):
+        self.paths.append(path)
+        os.write(1, self.output)
+        return self.result
+
+
+class TestRunHyperlight:
+    """Tests for _run_hyperlight backend function."""
+
+    async def test_captures_fd_stdout(self, tmp_path):
+        result = await _run_hyperlight("code", FakeSandbox(b"hello\n"), str(tmp_path))
+        assert result == "hello"
+
+    async def test_truncates_large_output(self, tmp_path):
+        sandbox = FakeSandbox(b"x" * 200_000)
+        result = await _run_hyperlight("code", sandbox, str(tmp_path))
+        assert "truncated" in result
+        assert len(result) <= 10100
+
+    async def test_reports_failure(self, tmp_path):
+        sandbox = FakeSandbox(b"", success=False, error="boom")
+        result = await _run_hyperlight("code", sandbox, str(tmp_path))
+        assert result == "Execution failed: boom"
+
+    async def test_removes_workload_file(self, tmp_path):
+        sandbox = FakeSandbox(b"")
+        await _run_hyperlight("code", sandbox, str(tmp_path), language="python")
+        assert sandbox.paths[0].endswith(".py")
+        assert not os.path.exists(sandbox.paths[0])
+
+    async def test_recreates_missing_workload_dir(self, tmp_path):
+        sandbox = FakeSandbox(b"ok")
+        result = await _run_hyperlight("code", sandbox, str(tmp_path / "removed"))
+        assert result == "ok"
+
+
+class TestHold:
+    """Tests for holding a threading lock from async code."""
+
+    async def test_waits_without_blocking_the_loop(self):
+        lock = threading.Lock()
+        lock.acquire()
+        entered = asyncio.Event()
+
+        async def use():
+            async with _hold(lock):
+                entered.set()
+
+        task = asyncio.create_task(use())
+        await asyncio.sleep(0.05)
+        assert not entered.is_set()
+        lock.release()
+        await asyncio.wait_for(task, timeout=5)
+        assert not lock.locked()
+
+    async def test_serializes_across_event_loops(self):
+        lock = threading.Lock()
+        active = []
+
+        async def use():
+            async with _hold(lock):
+                active.append(1)
+                assert len(active) == 1
+                await asyncio.sleep(0.02)
+                active.pop()
+
+        await asyncio.gather(use(), asyncio.to_thread(asyncio.run, use()))
+        assert not lock.locked()
+
+    async def test_cancelled_waiter_releases_lock(self):
+        lock = threading.Lock()
+        lock.acquire()
+
+        async def use():
+            async with _hold(lock):
+                pass
+
+        task = asyncio.create_task(use())
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        lock.release()
+        for _ in range(100):
+            if not lock.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert not lock.locked()
 
 
 class TestCodeExecutionToolPython:
@@ -72,22 +270,35 @@ class TestCodeExecutionToolPython:
         tool = CodeExecutionTool()
         assert "Python" in tool.description
 
-    @pytest.mark.asyncio
+    def test_instances_share_input_model(self):
+        first = CodeExecutionTool()
+        second = CodeExecutionTool(timeout=5)
+        assert second.input_model is first.input_model
+        assert "code" in second.parameters()["properties"]
+
+    def test_prewarm_is_noop_for_python(self):
+        tool = CodeExecutionTool(environment="python")
+        tool.prewarm()
+        assert tool._sandbox is None
+
+    @pytest.mark.integration
     async def test_execute_simple_code(self):
         tool = CodeExecutionTool(timeout=5, approval_mode="never_require")
         result = await tool._execute(code="print(2 + 2)")
         assert "4" in result
 
-    @pytest.mark.asyncio
+    @pytest.mark.integration
     async def test_execute_respects_timeout(self):
         tool = CodeExecutionTool(timeout=1, approval_mode="never_require")
         result = await tool._execute(code="import time; time.sleep(10)")
-        assert "timed out" in result.lower()
+        assert "timed out" in result
 
 
 class TestCodeExecutionToolHyperlight:
     """Tests for CodeExecutionTool with hyperlight environment (JavaScript)."""
 
+    pytestmark = pytest.mark.integration
+
     def test_hyperlight_available(self):
         """Verify hyperlight-nanvix module is installed."""
         assert HYPERLIGHT_AVAILABLE is True
@@ -111,14 +322,12 @@ class TestCodeExecutionToolHyperlight:
         tool = CodeExecutionTool(environment="hyperlight")
         assert "sandbox" in tool.description.lower() or "hyperlight" in tool.description.lower()
 
-    @pytest.mark.asyncio
     async def test_hyperlight_execute_returns_result(self):
         """Test that execute returns the expected output."""
         tool = CodeExecutionTool(environment="hyperlight", approval_mode="never_require")
         result = await tool._execute(code='console.log("hello")')
         assert "hello" in result
 
-    @pytest.mark.asyncio
     async def test_hyperlight_execute_simple_code(self):
         """Test that hyperlight executes JavaScript and returns output."""
         tool = CodeExecutionTool(environment="hyperlight", approval_mode="never_require")